@@ -0,0 +1,258 @@
+# Benchmark the Dash app's callbacks against synthetic feedback data of increasing size.
+#
+#   python benchmark.py --rows 10000 100000 1000000 --output bench.json
+#
+# Each size is generated once into --workdir, then measured in fresh processes: a cold start (no
+# snapshot, rollups or SQLite database on disk) and a warm start (all of them reused) that also times
+# every callback. Results are written as JSON so runs on different commits can be diffed.
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['brand', 'model', 'Feature', 'fact', 'source', 'segment', 'date', 'CriticalRanking', 'feedback', 'Summary']
+FACT_RANKINGS = {'Very Positive': 5, 'Positive': 4, 'Neutral': 3, 'Negative': 2, 'Very Negative': 1}
+VOCABULARY = [
+    'smooth', 'mileage', 'price', 'service', 'poor', 'noisy', 'safety', 'good', 'great', 'brakes',
+    'comfortable', 'bad', 'engine', 'value', 'seats', 'space', 'boot', 'cabin', 'ride', 'handling',
+]
+CHUNK_ROWS = 250000
+
+
+def text_pool(rng, size, min_words, max_words):
+    # A fixed pool of texts to sample from; joining words per row would dominate generation time
+    lengths = rng.integers(min_words, max_words + 1, size=size)
+    return np.array([' '.join(rng.choice(VOCABULARY, size=n)) for n in lengths], dtype=object)
+
+
+def generate_feedback_csv(path, rows, brands=5, models=40, features=25, sources=6, segments=4, days=730, seed=0):
+    # Write `rows` synthetic feedback rows with the app's schema; each model belongs to one brand
+    rng = np.random.default_rng(seed)
+    brand_names = np.array([f'Brand{i}' for i in range(brands)], dtype=object)
+    model_names = np.array([f'Model{i}' for i in range(models)], dtype=object)
+    model_brands = brand_names[np.arange(models) % brands]
+    feature_names = np.array([f'Feature{i}' for i in range(features)], dtype=object)
+    source_names = np.array([f'Source{i}' for i in range(sources)], dtype=object)
+    segment_names = np.array([f'Segment{i}' for i in range(segments)], dtype=object)
+    facts = np.array(list(FACT_RANKINGS), dtype=object)
+    rankings = np.array(list(FACT_RANKINGS.values()))
+    feedback = text_pool(rng, 4096, 5, 40)
+    summaries = text_pool(rng, 1024, 3, 8)
+    first_day = np.datetime64('2023-01-01')
+
+    written = 0
+    with open(path, 'w', encoding='latin1', newline='') as f:
+        while written < rows:
+            n = min(CHUNK_ROWS, rows - written)
+            model = rng.integers(0, models, size=n)
+            fact = rng.integers(0, len(facts), size=n)
+            dates = first_day + rng.integers(0, days, size=n).astype('timedelta64[D]')
+            chunk = pd.DataFrame({
+                'brand': model_brands[model],
+                'model': model_names[model],
+                'Feature': feature_names[rng.integers(0, features, size=n)],
+                'fact': facts[fact],
+                'source': source_names[rng.integers(0, sources, size=n)],
+                'segment': segment_names[rng.integers(0, segments, size=n)],
+                'date': pd.DatetimeIndex(dates).strftime('%Y-%m-%d'),
+                'CriticalRanking': rankings[fact],
+                'feedback': feedback[rng.integers(0, len(feedback), size=n)],
+                'Summary': summaries[rng.integers(0, len(summaries), size=n)],
+            }, columns=COLUMNS)
+            chunk.to_csv(f, header=written == 0, index=False)
+            written += n
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    return {
+        'runs': len(values),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p90_ms': round(float(np.percentile(values, 90)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def callback_cases(app_module):
+    # (name, thunk) pairs covering the main page callbacks with and without filters
+    # Everything is read through the catalog and query backend, so QUERY_BACKEND=sqlite runs too
+    ds = app_module.current_dataset()
+    backend = app_module.current_backend()
+    models = [option['value'] for option in ds.catalog['model_options'][1:]]
+    brands = [option['value'] for option in ds.catalog['brand_options'][1:]]
+    model = models[0]
+    row = backend.row(ds.row_count // 2)
+    dates = backend.trend_counts('day', None, pd.Timestamp('1900-01-01'), pd.Timestamp('2200-01-01')).index.get_level_values('day')
+    first, last = dates.min().strftime('%Y-%m-%d'), dates.max().strftime('%Y-%m-%d')
+    month_start = (dates.max() - pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+    detail = f"/feedback/details/{row['model']}/{row['row_id']}/{pd.Timestamp(row['date']).strftime('%Y-%m-%d')}"
+    return [
+        ('update_stacked_bar_chart[all]', lambda: app_module.update_stacked_bar_chart(
+            ['All'], ['All'], ['All'], ['All'], ['All'], ['All'], first, last)),
+        ('update_stacked_bar_chart[brand,last_30_days]', lambda: app_module.update_stacked_bar_chart(
+            [brands[0]], ['All'], ['All'], ['All'], ['All'], ['All'], month_start, last)),
+        ('update_selected_model_features_table[all]', lambda: app_module.update_selected_model_features_table(['All'], 0)),
+        ('update_selected_model_features_table[model]', lambda: app_module.update_selected_model_features_table([model], 0)),
+        ('get_feedback_layout', lambda: app_module.get_feedback_layout(model)),
+        ('display_page[main]', lambda: app_module.display_page('/')),
+        ('display_page[feedback]', lambda: app_module.display_page(f'/feedback/{model}')),
+        ('display_page[details]', lambda: app_module.display_page(detail)),
+        ('update_model_dropdown[all]', lambda: app_module.update_model_dropdown(['All'])),
+        ('update_model_dropdown[brand]', lambda: app_module.update_model_dropdown([brands[0]])),
+        ('update_feature_dropdown[all]', lambda: app_module.update_feature_dropdown(['All'])),
+        ('update_feature_dropdown[model]', lambda: app_module.update_feature_dropdown([model])),
+    ]
+
+
+def run_worker(args):
+    # Measure one start of the app in this (fresh) process and print the result as JSON
+    started = time.perf_counter()
+    import dash_app
+    imported = time.perf_counter()
+    dash_app.create_app({
+        'csv_path': args.csv,
+        'snapshot_path': args.snapshot,
+        'shared_dataset_path': None,
+        'sqlite_path': sqlite_file(args.csv),
+        'reload_interval': 0,
+    })
+    ready = time.perf_counter()
+    result = {
+        'import_s': round(imported - started, 4),
+        'create_app_s': round(ready - imported, 4),
+        'startup_s': round(ready - started, 4),
+        'rss_after_startup_bytes': peak_rss_bytes(),
+        'startup_phases_s': dict(dash_app.startup_timings),
+    }
+
+    if args.repeat:
+        callbacks = {}
+        for name, call in callback_cases(dash_app):
+            samples = []
+            for _ in range(args.repeat):
+                # Time the computation, not the result cache
+                dash_app.result_cache.clear()
+                start = time.perf_counter()
+                call()
+                samples.append(time.perf_counter() - start)
+            callbacks[name] = percentiles(samples)
+        result['callbacks'] = callbacks
+
+    result['peak_rss_bytes'] = peak_rss_bytes()
+    json.dump(result, sys.stdout)
+
+
+def sqlite_file(csv):
+    # Kept next to the generated CSV so QUERY_BACKEND=sqlite runs never reuse another dataset's file
+    return f'{os.path.splitext(csv)[0]}.sqlite'
+
+
+def derived_files(csv, snapshot):
+    # Everything create_app() reuses across starts: the snapshot, its persisted rollups (see
+    # dash_app.rollups_path) and the SQLite database
+    return [snapshot, f'{os.path.splitext(snapshot)[0]}.rollups.parquet', sqlite_file(csv)]
+
+
+def measure(csv, snapshot, repeat):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--csv', csv, '--snapshot', snapshot,
+               '--repeat', str(repeat)]
+    # A shared disk result cache would turn the timed calls into lookups, and the search index
+    # warm-up thread would compete with them for the GIL
+    env = {key: value for key, value in os.environ.items() if key != 'RESULT_CACHE_DIR'}
+    env['SEARCH_INDEX_WARMUP'] = '0'
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(output.stdout)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], check=True, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dash_app callbacks on synthetic feedback data')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--brands', type=int, default=5)
+    parser.add_argument('--models', type=int, default=40)
+    parser.add_argument('--features', type=int, default=25)
+    parser.add_argument('--sources', type=int, default=6)
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per callback')
+    parser.add_argument('--workdir', default='benchmark-data', help='where generated CSVs are kept between runs')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--snapshot', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    cardinalities = {
+        'brands': args.brands, 'models': args.models, 'features': args.features,
+        'sources': args.sources, 'segments': args.segments, 'days': args.days,
+    }
+    os.makedirs(args.workdir, exist_ok=True)
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cardinalities': cardinalities,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'runs': [],
+    }
+    for rows in args.rows:
+        name = '-'.join([f'rows{rows}', f'seed{args.seed}'] + [f'{key}{value}' for key, value in cardinalities.items()])
+        csv = os.path.abspath(os.path.join(args.workdir, f'{name}.csv'))
+        snapshot = os.path.abspath(os.path.join(args.workdir, f'{name}.snapshot.parquet'))
+        if not os.path.exists(csv):
+            start = time.perf_counter()
+            generate_feedback_csv(csv, rows, seed=args.seed, **cardinalities)
+            print(f'generated {rows} rows in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+        for path in derived_files(csv, snapshot):
+            if os.path.exists(path):
+                os.remove(path)
+
+        cold = measure(csv, snapshot, repeat=0)
+        warm = measure(csv, snapshot, repeat=args.repeat)
+        report['runs'].append({
+            'rows': rows,
+            'csv_bytes': os.path.getsize(csv),
+            'cold_start': cold,
+            'warm_start': warm,
+        })
+        print(f'measured {rows} rows', file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
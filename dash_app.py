@@ -1,19 +1,2441 @@
-from dash import Dash, dcc, html, dash_table
+import time
+
+# Start of the module import, for the startup timing breakdown
+IMPORT_STARTED = time.perf_counter()
+
+import dash
+from dash import Dash, callback, clientside_callback, dcc, html, dash_table
 from dash.dependencies import Input, Output, State
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+from flask import Blueprint, Response, abort, request, stream_with_context
 from flask_cors import CORS
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import contextvars
+import functools
+import glob
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import pickle
 import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import zlib
+
+# Parquet snapshots are optional; without pyarrow we parse the CSV on every start
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Only used to serialize rebuilds of the shared dataset file between worker processes
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LIBRARIES_IMPORTED = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+# Source CSV (or a directory / glob of CSV shards) and the columnar snapshot derived from it
+csv_path = os.environ.get('FEEDBACK_CSV_PATH', r"Test Try 2.csv")
+snapshot_path = os.environ.get('FEEDBACK_SNAPSHOT_PATH', os.path.splitext(csv_path)[0] + '.snapshot.parquet')
+
+# Where the callbacks' queries run: 'pandas' (the dataset held in memory by every process) or 'sqlite'
+# (an indexed database file built from the CSV chunk by chunk). With 'sqlite' no rows are held in
+# memory, only aggregates such as the dropdown catalog, so the dataset may be larger than memory;
+# full-text search and the row-level API (/data, /export, /search) need the rows and are unavailable
+QUERY_BACKEND = os.environ.get('QUERY_BACKEND', 'pandas')
+sqlite_path = os.environ.get('FEEDBACK_SQLITE_PATH', os.path.splitext(csv_path)[0] + '.sqlite')
+
+# Bump whenever the snapshot layout changes so stale snapshots get rebuilt
+SNAPSHOT_FORMAT = 6
+SNAPSHOT_METADATA_KEY = b'feedback_snapshot'
+
+# Low-cardinality dimensions held as categoricals in the canonical frame
+CATEGORICAL_COLUMNS = ['brand', 'model', 'Feature', 'fact', 'source', 'segment']
+
+
+# Columns read from the CSV; anything else is dropped while parsing
+FEEDBACK_COLUMNS = CATEGORICAL_COLUMNS + ['date', 'CriticalRanking', 'feedback', 'Summary']
+# Parse types, so no column goes through type inference or a wide object phase
+FEEDBACK_DTYPES = {
+    **{column: 'category' for column in CATEGORICAL_COLUMNS},
+    'date': str,
+    'CriticalRanking': str,
+    'feedback': str,
+    'Summary': str,
+}
+# Rows parsed per chunk, and processes parsing shards in parallel (0 or 1 parses in this process)
+INGEST_CHUNK_ROWS = int(os.environ.get('INGEST_CHUNK_ROWS', 200000))
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 0))
+
+SourceStat = namedtuple('SourceStat', ['st_size', 'st_mtime_ns'])
+
+
+def feedback_source_files(source_path):
+    # The CSV files behind a source: the file itself, every *.csv in a directory, or a glob's matches,
+    # in sorted order so row ids are stable across loads
+    if os.path.isdir(source_path):
+        return sorted(glob.glob(os.path.join(source_path, '*.csv')))
+    if any(char in source_path for char in '*?['):
+        return sorted(glob.glob(source_path))
+    return [source_path]
+
+
+def source_stat(source_path):
+    # Total size and latest modification time over the source's files
+    stats = [os.stat(path) for path in feedback_source_files(source_path)]
+    if not stats:
+        raise FileNotFoundError(f'No CSV files match {source_path}')
+    return SourceStat(sum(stat.st_size for stat in stats), max(stat.st_mtime_ns for stat in stats))
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_source(source_path):
+    files = feedback_source_files(source_path)
+    if files == [source_path]:
+        return hash_file(source_path)
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(f'{os.path.basename(path)}:{hash_file(path)}\n'.encode())
+    return digest.hexdigest()
+
+
+def csv_fingerprint(path):
+    stat = source_stat(path)
+    return {'format': SNAPSHOT_FORMAT, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_snapshot_key(path):
+    # The key lives in the Parquet schema metadata, so checking it never touches the row data
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return None
+    raw = metadata.get(SNAPSHOT_METADATA_KEY)
+    return json.loads(raw) if raw else None
+
+
+def write_snapshot(frame, path, key):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SNAPSHOT_METADATA_KEY] = json.dumps(key).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the target and rename so readers never see a half-written file
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def compact_feedback_frame(frame):
+    # Convert parsed CSV rows into the compact typed columns every callback reads
+    for column in CATEGORICAL_COLUMNS:
+        if column not in frame.columns:
+            continue
+        if not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype('category')
+        elif not frame[column].cat.categories.is_monotonic_increasing:
+            frame[column] = frame[column].cat.reorder_categories(frame[column].cat.categories.sort_values())
+    if 'date' in frame.columns:
+        frame['date'] = pd.to_datetime(frame['date'], errors='coerce')
+    if 'CriticalRanking' in frame.columns:
+        frame['CriticalRanking'] = pd.to_numeric(frame['CriticalRanking'], errors='coerce').astype('Int8')
+    if 'feedback' in frame.columns and 'word_count' not in frame.columns:
+        frame['word_count'] = frame['feedback'].str.count(r'\S+').fillna(0).astype('int32')
+    return frame
+
+
+def normalize_feedback_frame(frame, first_row_id=0):
+    # Convert a freshly parsed CSV frame into the canonical typed layout every callback reads.
+    # row_id is the row's position in the CSV, so it survives re-sorting and rebuilding the snapshot
+    frame['row_id'] = np.arange(first_row_id, first_row_id + len(frame), dtype=np.int64)
+    frame = compact_feedback_frame(frame)
+
+    # Lay rows out by date (undated rows last) so date ranges map to contiguous row positions
+    if 'date' in frame.columns:
+        frame = frame.sort_values('date', kind='stable', na_position='last', ignore_index=True)
+    return frame
+
+
+def concat_feedback_frames(frames):
+    # Concatenate compact frames in order, merging categories instead of falling back to object columns
+    if len(frames) == 1:
+        return frames[0]
+    columns = {}
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            columns[column] = pd.api.types.union_categoricals(
+                [frame[column].astype('category') for frame in frames], sort_categories=True
+            )
+        else:
+            columns[column] = pd.concat([frame[column] for frame in frames], ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_feedback_csv(path):
+    # Parse one CSV in bounded chunks, compacting each chunk before the next one is read
+    chunks = pd.read_csv(path, encoding='latin1', usecols=lambda column: column in FEEDBACK_COLUMNS,
+                         dtype=FEEDBACK_DTYPES, chunksize=INGEST_CHUNK_ROWS)
+    frames = [compact_feedback_frame(chunk) for chunk in chunks]
+    if not frames:
+        # A header-only file yields no chunks
+        frames = [compact_feedback_frame(pd.read_csv(path, encoding='latin1', dtype=FEEDBACK_DTYPES,
+                                                     usecols=lambda column: column in FEEDBACK_COLUMNS))]
+    return concat_feedback_frames(frames)
+
+
+def read_feedback_source(source_path, workers=None):
+    # The canonical frame for every shard of a source, row ids following shard then line order.
+    # Shards are parsed in a process pool when more than one worker is configured
+    files = feedback_source_files(source_path)
+    workers = INGEST_WORKERS if workers is None else workers
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            frames = list(pool.map(read_feedback_csv, files))
+    else:
+        frames = [read_feedback_csv(path) for path in files]
+    return normalize_feedback_frame(concat_feedback_frames(frames))
+
+
+def load_feedback_data(source_path, snapshot=None):
+    if pq is None:
+        return read_feedback_source(source_path)
+
+    snapshot = snapshot or snapshot_path
+    key = csv_fingerprint(source_path)
+    stored = read_snapshot_key(snapshot)
+
+    if stored and stored.get('format') == key['format'] and stored.get('size') == key['size']:
+        if stored.get('mtime_ns') == key['mtime_ns']:
+            return pd.read_parquet(snapshot)
+
+        # Same size but touched: only rebuild if the content actually changed
+        key['sha256'] = hash_source(source_path)
+        if stored.get('sha256') == key['sha256']:
+            frame = pd.read_parquet(snapshot)
+            try:
+                write_snapshot(frame, snapshot, key)
+            except (OSError, pa.ArrowException):
+                logger.warning('Could not refresh snapshot key for %s', snapshot, exc_info=True)
+            return frame
+
+    logger.info('Building snapshot %s from %s', snapshot, source_path)
+    frame = read_feedback_source(source_path)
+    key.setdefault('sha256', hash_source(source_path))
+    try:
+        write_snapshot(frame, snapshot, key)
+    except (OSError, pa.ArrowException):
+        logger.warning('Could not write snapshot %s, continuing from CSV', snapshot, exc_info=True)
+    return frame
+
+
+# Dimensions of the pre-aggregated sentiment cube; rows are additionally bucketed by day
+CUBE_DIMENSIONS = ['brand', 'model', 'Feature', 'fact', 'source', 'segment']
+
+
+def build_sentiment_cube(frame):
+    # Rows without a model, fact or date can never show up in the chart, so leave them out
+    counted = frame[frame['model'].notna() & frame['fact'].notna() & frame['date'].notna()]
+    dimensions = [column for column in CUBE_DIMENSIONS if column in counted.columns]
+    keys = counted[dimensions].assign(day=counted['date'].dt.normalize())
+    cube = keys.groupby(dimensions + ['day'], observed=True, dropna=False).size().reset_index(name='count')
+
+    # Keep the cube sorted by day so date ranges are answered with a binary search
+    return cube.sort_values('day', kind='stable', ignore_index=True)
+
+
+# Trend granularities and the pandas period each bucket spans (weeks start on Monday)
+ROLLUP_PERIODS = {'day': 'D', 'week': 'W', 'month': 'M'}
+
+
+def bucket_start(days, granularity):
+    # First day of the bucket containing each day (a Series of datetimes or a single Timestamp)
+    if granularity == 'day':
+        return days
+    if isinstance(days, pd.Timestamp):
+        return days.to_period(ROLLUP_PERIODS[granularity]).start_time
+    return days.dt.to_period(ROLLUP_PERIODS[granularity]).dt.start_time
+
+
+def build_rollup(daily, granularity):
+    # Sum a day-level cube into buckets; 'day' then holds each bucket's first day
+    if granularity == 'day':
+        return daily
+    dimensions = [column for column in CUBE_DIMENSIONS if column in daily.columns]
+    keys = daily[dimensions].assign(day=bucket_start(daily['day'], granularity), count=daily['count'])
+    rollup = keys.groupby(dimensions + ['day'], observed=True, dropna=False)['count'].sum().reset_index()
+    return rollup.sort_values('day', kind='stable', ignore_index=True)
+
+
+def build_rollups(frame):
+    # The daily sentiment cube plus coarser rollups derived from it, one per granularity
+    daily = build_sentiment_cube(frame)
+    return {granularity: build_rollup(daily, granularity) for granularity in ROLLUP_PERIODS}
+
+
+def align_categories(cube, frame):
+    # Give the cube's categorical dimensions the frame's categories, so cubes can be concatenated
+    columns = {}
+    for column in CUBE_DIMENSIONS:
+        if column in cube.columns and isinstance(frame[column].dtype, pd.CategoricalDtype):
+            columns[column] = cube[column].astype(frame[column].dtype)
+    return cube.assign(**columns)
+
+
+def update_rollups(rollups, tail, frame):
+    # Fold appended rows into existing rollups, recomputing only the buckets the new rows fall in.
+    # `frame` is the merged frame, whose categories cover both the old and the new rows
+    daily_tail = align_categories(build_sentiment_cube(tail), frame)
+    updated = {}
+    for granularity, rollup in rollups.items():
+        rollup = align_categories(rollup, frame)
+        added = build_rollup(daily_tail, granularity)
+        affected = rollup['day'].isin(added['day'].unique())
+        dimensions = [column for column in CUBE_DIMENSIONS if column in rollup.columns]
+        recomputed = (
+            pd.concat([rollup[affected], added], ignore_index=True)
+            .groupby(dimensions + ['day'], observed=True, dropna=False)['count'].sum().reset_index()
+        )
+        merged = pd.concat([rollup[~affected], recomputed], ignore_index=True)
+        updated[granularity] = merged.sort_values('day', kind='stable', ignore_index=True)
+    return updated
+
+
+# Rollups are saved next to the snapshot, keyed by the dataset version they were built for, so a
+# warm start reads them instead of re-aggregating every row
+ROLLUPS_METADATA_KEY = b'feedback_rollups'
+
+
+def rollups_path(snapshot):
+    return f'{os.path.splitext(snapshot)[0]}.rollups.parquet'
+
+
+def read_rollups(path, version):
+    # The saved rollups for `version`, or None when missing or built for another version
+    try:
+        parquet = pq.ParquetFile(path)
+    except (OSError, pa.ArrowException):
+        return None
+    raw = (parquet.schema_arrow.metadata or {}).get(ROLLUPS_METADATA_KEY)
+    stored = json.loads(raw) if raw else None
+    if not stored or stored['version'] != version:
+        return None
+    table = parquet.read()
+    rollups, start = {}, 0
+    for granularity, rows in stored['rows'].items():
+        rollups[granularity] = table.slice(start, rows).to_pandas()
+        start += rows
+    return rollups
+
+
+def write_rollups(rollups, path, version):
+    # All granularities in one file, one after another, with their row counts in the metadata
+    table = pa.Table.from_pandas(pd.concat(rollups.values(), ignore_index=True), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[ROLLUPS_METADATA_KEY] = json.dumps({
+        'version': version,
+        'rows': {granularity: len(rollup) for granularity, rollup in rollups.items()},
+    }).encode()
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_rollups(rollups, snapshot, version):
+    try:
+        write_rollups(rollups, rollups_path(snapshot), version)
+    except (OSError, pa.ArrowException):
+        logger.warning('Could not save rollups next to %s', snapshot, exc_info=True)
+
+
+# Dimensions with an inverted index from value to sorted row positions
+INDEXED_COLUMNS = ['brand', 'model', 'Feature', 'fact', 'source']
+
+
+def build_filter_index(frame, orders=None):
+    # Returns the posting lists and, per column, the position array they are views into.
+    # `orders` may supply those arrays precomputed (e.g. memory-mapped from the shared dataset)
+    index = {}
+    orders = dict(orders or {})
+    for column in INDEXED_COLUMNS:
+        if column not in frame.columns:
+            continue
+        values = frame[column].cat
+        codes = values.codes.to_numpy()
+
+        # One stable argsort per column groups row positions by value, ascending within each group;
+        # every posting list is a view into that single int32 array
+        if column not in orders:
+            orders[column] = np.argsort(codes, kind='stable').astype(np.int32)
+        order = orders[column]
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+        offsets = np.cumsum(counts) + np.count_nonzero(codes < 0)
+        index[column] = {
+            value: order[stop - count:stop]
+            for value, count, stop in zip(values.categories, counts, offsets)
+            if count
+        }
+    return index, orders
+
+
+# Orderings precomputed for every model's feedback: sort key per row, smallest first
+FEEDBACK_RANKINGS = {
+    'words': lambda frame: -frame['word_count'].to_numpy(dtype='int64'),
+    'newest': lambda frame: np.where(frame['date'].isna(), np.iinfo('int64').max,
+                                     -frame['date'].to_numpy(dtype='datetime64[ns]').astype('int64', copy=False)),
+    'critical': lambda frame: frame['CriticalRanking'].to_numpy(dtype='float64', na_value=np.inf),
+}
+
+
+def build_feedback_rankings(frame, orders=None):
+    # For each ranking, all row positions ordered by (model, key, position); each model's rows
+    # form one contiguous run located through model_offsets. `orders` may supply precomputed orderings
+    models = frame['model'].cat
+    codes = models.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(models.categories))
+    stops = np.cumsum(counts) + np.count_nonzero(codes < 0)
+    model_offsets = {
+        model: (int(stop - count), int(stop))
+        for model, count, stop in zip(models.categories, counts, stops)
+        if count
+    }
+    orders = dict(orders or {})
+    for name, key in FEEDBACK_RANKINGS.items():
+        if name not in orders:
+            orders[name] = np.lexsort((key(frame), codes)).astype(np.int32)
+    return model_offsets, orders
+
+
+# CriticalRanking values shown in the random critical-models table, with their labels
+CRITICAL_RANKINGS = {1: 'Negative', 5: 'Positive'}
+
+
+def build_critical_rows(frame, model_offsets, critical_order):
+    # model -> row positions whose CriticalRanking is in CRITICAL_RANKINGS. Each model's run of the
+    # 'critical' ranking is sorted by CriticalRanking, so every value is one searchsorted range
+    ranks = frame['CriticalRanking'].to_numpy(dtype='float64', na_value=np.nan)[critical_order]
+    critical_rows = {}
+    for model, (start, stop) in model_offsets.items():
+        run = ranks[start:stop]
+        parts = [
+            critical_order[start + run.searchsorted(value, side='left'):start + run.searchsorted(value, side='right')]
+            for value in CRITICAL_RANKINGS
+        ]
+        rows = np.concatenate(parts)
+        if len(rows):
+            critical_rows[model] = rows
+    return critical_rows
+
+
+# Text columns covered by full-text search
+TEXT_COLUMNS = ['feedback', 'Summary']
+TOKEN_PATTERN = re.compile(r'\w+')
+TEXT_INDEX_CHUNK_ROWS = 200000
+# Build each dataset version's search index in a background thread as soon as it is swapped in (1),
+# rather than on the first search. Off by default: the index is private to each process, so warming
+# it in every worker costs memory even where nobody searches
+SEARCH_INDEX_WARMUP = os.environ.get('SEARCH_INDEX_WARMUP', '0') == '1'
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+# Intersect with a dense row table instead of binary searches once the surviving rows number more
+# than 1/DENSE_LOOKUP_RATIO of the next posting list
+DENSE_LOOKUP_RATIO = 16
+
+
+class TextIndex:
+    # Inverted index over the text columns. Postings are stored compactly: for term id t, rows and
+    # term frequencies live in rows[offsets[t]:offsets[t + 1]] and frequencies[...], rows ascending
+    def __init__(self, terms, offsets, rows, frequencies, lengths):
+        self.terms = terms
+        self.offsets = offsets
+        self.rows = rows
+        self.frequencies = frequencies
+        self.lengths = lengths
+        self.average_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    def postings(self, term):
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return None
+        start, stop = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.rows[start:stop], self.frequencies[start:stop]
+
+    def term_scores(self, rows, frequencies, document_frequency):
+        # BM25 contribution of one term to each of `rows`
+        idf = np.log1p((len(self.lengths) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[rows] / max(self.average_length, 1.0))
+        return (idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)).astype(np.float32)
+
+    def search(self, text):
+        # Sorted row positions containing every term of `text`, their BM25 scores, and the number of
+        # postings read
+        empty = np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), 0
+        lists = [self.postings(term) for term in set(tokenize(text))]
+        if not lists or any(postings is None for postings in lists):
+            return empty
+
+        # Start from the rarest term and look the surviving rows up in each longer list, so the work
+        # is bounded by the rarest term's postings rather than the longest list
+        lists.sort(key=lambda postings: len(postings[0]))
+        rows, frequencies = lists[0]
+        scores = self.term_scores(rows, frequencies, len(rows))
+        scanned = len(rows)
+        for term_rows, term_frequencies in lists[1:]:
+            if len(rows) * DENSE_LOOKUP_RATIO > len(term_rows):
+                # Comparable list sizes: scatter the longer list into a row-indexed table and read
+                # the survivors back, which beats a binary search per surviving row
+                dense = np.zeros(len(self.lengths), dtype=term_frequencies.dtype)
+                dense[term_rows] = term_frequencies
+                frequencies = dense[rows]
+                matched = frequencies > 0
+                rows, frequencies = rows[matched], frequencies[matched]
+            else:
+                found = np.minimum(np.searchsorted(term_rows, rows), len(term_rows) - 1)
+                matched = term_rows[found] == rows
+                rows, frequencies = rows[matched], term_frequencies[found[matched]]
+            scores = scores[matched] + self.term_scores(rows, frequencies, len(term_rows))
+            scanned += len(matched)
+            if not len(rows):
+                break
+        return rows.astype(np.int32), scores, scanned
+
+
+def build_text_index(frame):
+    # Tokenize the text columns once, chunk by chunk so only one chunk's tokens are held as strings
+    columns = [column for column in TEXT_COLUMNS if column in frame.columns]
+    terms = {}
+    term_parts, row_parts, frequency_parts = [], [], []
+    lengths = np.zeros(len(frame), dtype=np.int32)
+    for start in range(0, len(frame), TEXT_INDEX_CHUNK_ROWS):
+        chunk = frame.iloc[start:start + TEXT_INDEX_CHUNK_ROWS]
+        text = pd.Series('', index=range(start, start + len(chunk)), dtype=object)
+        for column in columns:
+            text = text + ' ' + chunk[column].astype(object).fillna('').astype(str).to_numpy()
+        tokens = text.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+        if tokens.empty:
+            continue
+        codes, uniques = pd.factorize(tokens.to_numpy())
+        term_ids = np.array([terms.setdefault(term, len(terms)) for term in uniques], dtype=np.int64)[codes]
+        positions = tokens.index.to_numpy(dtype=np.int64)
+        lengths[start:start + len(chunk)] = np.bincount(positions - start, minlength=len(chunk))
+        # One (term, row) key per token; counting equal keys gives the term frequencies
+        keys, frequencies = np.unique(term_ids * len(frame) + positions, return_counts=True)
+        term_parts.append(keys // len(frame))
+        row_parts.append((keys % len(frame)).astype(np.int32))
+        frequency_parts.append(np.minimum(frequencies, np.iinfo(np.uint16).max).astype(np.uint16))
+
+    if not term_parts:
+        return TextIndex({}, np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32),
+                         np.empty(0, dtype=np.uint16), lengths)
+    term_ids = np.concatenate(term_parts)
+    # Chunks cover ascending rows, so a stable sort by term keeps every posting list row-ordered
+    order = np.argsort(term_ids, kind='stable')
+    offsets = np.searchsorted(term_ids[order], np.arange(len(terms) + 1)).astype(np.int64)
+    return TextIndex(terms, offsets, np.concatenate(row_parts)[order], np.concatenate(frequency_parts)[order], lengths)
+
+
+# Sentiment values in display order
+FACT_CATEGORIES = ['Very Positive', 'Positive', 'Neutral', 'Negative', 'Very Negative']
+
+
+def dropdown_options(counts, order=None):
+    # Dropdown options labelled with row counts, "All" first and values sorted unless an order is given
+    values = order if order is not None else sorted(counts)
+    options = [{'label': f'{value} ({counts.get(value, 0):,})', 'value': value} for value in values]
+    options.insert(0, {'label': 'All', 'value': 'All'})
+    return options
+
+
+def value_counts(frame, column):
+    counts = frame[column].value_counts(sort=False)
+    return {value: int(count) for value, count in counts.items() if count}
+
+
+def nested_counts(frame, outer, inner):
+    # {outer value: {inner value: rows}} from one grouped count
+    return nest_counts(frame.groupby([outer, inner], observed=True).size())
+
+
+def nest_counts(counts):
+    # {outer value: {inner value: count}} from counts indexed by (outer, inner)
+    nested = {}
+    for (outer_value, inner_value), count in counts.items():
+        nested.setdefault(outer_value, {})[inner_value] = int(count)
+    return nested
+
+
+# Columns with a dropdown whose options come from the catalog
+CATALOG_COLUMNS = ['brand', 'model', 'Feature', 'fact', 'source']
+
+
+def build_option_catalog(frame):
+    # Dropdown option lists and hierarchy maps for one dataset version
+    return option_catalog(
+        {column: value_counts(frame, column) for column in CATALOG_COLUMNS},
+        nested_counts(frame, 'brand', 'model'),
+        nested_counts(frame, 'model', 'Feature'),
+    )
+
+
+def option_catalog(counts, brand_models, model_features):
+    # The catalog from each catalog column's value counts and the brand/model/Feature hierarchy
+    return {
+        'brand_options': dropdown_options(counts['brand']),
+        'model_options': dropdown_options(counts['model']),
+        'feature_options': dropdown_options(counts['Feature']),
+        'fact_options': dropdown_options(counts['fact'], order=FACT_CATEGORIES),
+        'source_options': dropdown_options(counts['source']),
+        'brand_models': brand_models,
+        'model_features': model_features,
+    }
+
+
+# Dropdown columns whose counts per parent value are kept in the catalog
+NESTED_PARENTS = {'model': 'brand', 'Feature': 'model'}
+NESTED_CATALOG = {'model': 'brand_models', 'Feature': 'model_features'}
+
+
+def merged_counts(nested, keys):
+    # Union of the per-key count maps, summing counts of values shared between keys
+    merged = {}
+    for key in keys:
+        for value, count in nested.get(key, {}).items():
+            merged[value] = merged.get(value, 0) + count
+    return merged
+
+
+# Features listed per model in the main page's features table
+TOP_FEATURE_COUNT = 3
+
+
+# CriticalRanking of neutral feedback and its distance to either end of the scale; a row's net
+# sentiment is (CriticalRanking - NEUTRAL_RANKING) / RANKING_SPAN, from -1 to 1
+NEUTRAL_RANKING = 3
+RANKING_SPAN = 2
+
+
+def build_top_features(frame):
+    # model -> (positive, negative) features: the highest average CriticalRanking among the model's
+    # rows rated above neutral and the lowest among those rated below it, ranked in one grouped pass
+    ranking = frame['CriticalRanking'].astype('float64')
+    positive = ranking > NEUTRAL_RANKING
+    negative = ranking < NEUTRAL_RANKING
+    totals = pd.DataFrame({
+        'model': frame['model'],
+        'Feature': frame['Feature'],
+        'positive_sum': ranking.where(positive, 0),
+        'positive_rows': positive.astype('int64'),
+        'negative_sum': ranking.where(negative, 0),
+        'negative_rows': negative.astype('int64'),
+    }).groupby(['model', 'Feature'], observed=True, sort=False).sum().reset_index()
+    return rank_top_features(totals)
+
+
+def rank_top_features(totals):
+    # Top features per model from rating totals per (model, Feature): the summed CriticalRanking and
+    # number of rows above neutral (positive_sum, positive_rows) and below it (negative_*)
+    def top(kind, ascending):
+        rows = totals[totals[f'{kind}_rows'] > 0]
+        rows = rows.assign(score=rows[f'{kind}_sum'] / rows[f'{kind}_rows'])
+        # Ties go to the feature with more rows, then alphabetically
+        rows = rows.sort_values(['score', f'{kind}_rows', 'Feature'], ascending=[ascending, False, True], kind='stable')
+        rows = rows.groupby('model', observed=True, sort=False).head(TOP_FEATURE_COUNT)
+        features = {}
+        for model, feature in zip(rows['model'], rows['Feature']):
+            features.setdefault(model, []).append(feature)
+        return features
+
+    positives = top('positive', ascending=False)
+    negatives = top('negative', ascending=True)
+    return {model: (positives.get(model, []), negatives.get(model, []))
+            for model in sorted(totals['model'].unique())}
+
+
+def active_filters(brands=None, models=None, features=None, facts=None, sources=None):
+    # Map dropdown selections onto indexed columns; an empty selection or "All" means no filter
+    selections = {'brand': brands, 'model': models, 'Feature': features, 'fact': facts, 'source': sources}
+    return {column: list(values) for column, values in selections.items() if values and 'All' not in values}
+
+
+# Rows in the evenly strided sample used for quick approximate results
+APPROXIMATE_SAMPLE_ROWS = 20000
+
+
+class FeedbackDataset:
+    # Immutable snapshot of the canonical feedback frame together with the structures derived from it.
+    # Reloads build a new instance and swap it in; callbacks read one instance for their whole run
+    def __init__(self, frame, version=None, source=None, shared=None, rollups=None):
+        shared = shared or {}
+        self.frame = frame
+        self.version = version
+        self.source = source
+        self.row_count = len(frame)
+        self.rollups = rollups or build_rollups(frame)
+        self.cube = self.rollups['day']
+        self.index, self.index_orders = build_filter_index(frame, shared.get('index'))
+        self.dates = frame['date'].to_numpy()
+        self.dated_rows = int(frame['date'].notna().sum())
+        self.model_offsets, self.rankings = build_feedback_rankings(frame, shared.get('rankings'))
+        self.critical_rows = build_critical_rows(frame, self.model_offsets, self.rankings['critical'])
+        self.catalog = build_option_catalog(frame)
+        self.top_features = build_top_features(frame)
+        self._text_index = None
+        self._text_index_lock = threading.Lock()
+        self.sample_step = max(1, len(frame) // APPROXIMATE_SAMPLE_ROWS)
+        self.sample = frame[INDEXED_COLUMNS].iloc[::self.sample_step]
+
+        # Dense row_id -> row position table for constant-time detail lookups
+        row_ids = frame['row_id'].to_numpy()
+        self.row_positions = np.full(int(row_ids.max()) + 1 if len(row_ids) else 0, -1, dtype=np.int32)
+        self.row_positions[row_ids] = np.arange(len(row_ids), dtype=np.int32)
+
+    @property
+    def text_index(self):
+        # Built on first use: tokenizing every row is by far the slowest structure to build, and
+        # only search needs it
+        if self._text_index is None:
+            with self._text_index_lock:
+                if self._text_index is None:
+                    self._text_index = build_text_index(self.frame)
+        return self._text_index
+
+    def row(self, row_id):
+        # The feedback row with the given stable id, or None
+        if not 0 <= row_id < len(self.row_positions) or self.row_positions[row_id] < 0:
+            return None
+        return self.frame.iloc[self.row_positions[row_id]]
+
+    def ranked_rows(self, model, ranking='words', limit=None):
+        # Row positions of a model's feedback in ranking order, read straight from the precomputed run
+        start, stop = self.model_offsets.get(model, (0, 0))
+        if limit is not None:
+            stop = min(stop, start + limit)
+        count_rows(stop - start, stop - start)
+        return self.rankings[ranking][start:stop]
+
+    def date_range(self, from_date=None, to_date=None):
+        # Row positions [start, stop) covering the whole days between from_date and to_date
+        if from_date is None and to_date is None:
+            return 0, len(self.frame)
+        dates = self.dates[:self.dated_rows]
+        start = 0 if from_date is None else int(dates.searchsorted(from_date.to_datetime64(), side='left'))
+        if to_date is None:
+            return start, self.dated_rows
+        next_day = (to_date.normalize() + pd.Timedelta(days=1)).to_datetime64()
+        return start, int(dates.searchsorted(next_day, side='left'))
+
+    def query(self, filters=None, from_date=None, to_date=None):
+        # Sorted row positions matching every filter, touching only the matching posting lists
+        start, stop = self.date_range(from_date, to_date)
+        matches = []
+        for column, values in (filters or {}).items():
+            postings = self.index[column]
+            parts = []
+            for value in values:
+                rows = postings.get(value)
+                if rows is not None:
+                    parts.append(rows[rows.searchsorted(start):rows.searchsorted(stop)])
+            if not parts:
+                count_rows(sum(map(len, matches)), 0)
+                return np.empty(0, dtype=np.int32)
+            # A row has a single value per column, so the parts are disjoint
+            matches.append(parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts)))
+
+        if not matches:
+            count_rows(stop - start, stop - start)
+            return np.arange(start, stop, dtype=np.int32)
+        matches.sort(key=len)
+        result = matches[0]
+        for rows in matches[1:]:
+            result = np.intersect1d(result, rows, assume_unique=True)
+        count_rows(sum(map(len, matches)), len(result))
+        return result
+
+    def search(self, text, filters=None, from_date=None, to_date=None, limit=None):
+        # Row positions of the best `limit` (default all) feedback rows matching every term of `text`
+        # and the filters, best match first (newest first among equal scores), with their scores and
+        # the number of matching rows
+        rows, scores, scanned = self.text_index.search(text)
+        start, stop = self.date_range(from_date, to_date)
+        keep = (rows >= start) & (rows < stop)
+        for column, values in (filters or {}).items():
+            keep &= self.frame[column].take(rows).isin(values).to_numpy()
+        rows, scores = rows[keep], scores[keep]
+        total = len(rows)
+        count_rows(scanned, total)
+        if limit is not None and limit < total:
+            # Only the rows scoring at least the limit-th best score can make the cut; keep all ties
+            # at that score so the newest-first tie break still applies
+            if limit <= 0:
+                return rows[:0], scores[:0], total
+            cutoff = -np.partition(-scores, limit - 1)[limit - 1]
+            candidates = scores >= cutoff
+            rows, scores = rows[candidates], scores[candidates]
+        order = np.lexsort((-rows, -scores))[:limit]
+        return rows[order], scores[order], total
+
+    def select(self, filters=None, from_date=None, to_date=None, columns=None):
+        rows = self.frame.take(self.query(filters, from_date, to_date))
+        return rows if columns is None else rows[columns]
+
+    def approximate_counts(self, by, filters=None, from_date=None, to_date=None):
+        # Row counts grouped by `by`, estimated from every sample_step-th row instead of all of them
+        start, stop = self.date_range(from_date, to_date)
+        step = self.sample_step
+        sample = self.sample.iloc[-(-start // step):-(-stop // step)]
+        scanned = len(sample)
+        for column, values in (filters or {}).items():
+            sample = sample[sample[column].isin(values)]
+        count_rows(scanned, len(sample))
+        return sample.groupby(by, observed=True).size() * step
+
+    def sentiment_crosstab(self, group=None, filters=None, from_date=None, to_date=None):
+        # Feature x fact row counts and net sentiment contributions for the matching rows, optionally
+        # split per `group` (brand or model), from one bincount over the row keys actually present. A
+        # cell's contribution is its rows' summed net sentiment divided by the rated rows of its
+        # feature row, so each row's contributions add up to that feature's net sentiment
+        positions = self.query(filters, from_date, to_date)
+        frame = self.frame
+        row_columns = ['Feature'] if group is None else [group, 'Feature']
+        levels = [frame[column].cat.categories for column in row_columns]
+        row_codes = np.zeros(len(positions), dtype=np.int64)
+        keep = np.ones(len(positions), dtype=bool)
+        for column, categories in zip(row_columns, levels):
+            codes = frame[column].cat.codes.to_numpy().take(positions)
+            keep &= codes >= 0
+            row_codes = row_codes * len(categories) + codes
+        fact_codes = frame['fact'].cat.codes.to_numpy().take(positions)
+        keep &= fact_codes >= 0
+        ranking = frame['CriticalRanking'].to_numpy(dtype='float64', na_value=np.nan).take(positions)[keep]
+        count_rows(len(positions), int(keep.sum()))
+
+        # Facts in display order
+        facts = frame['fact'].cat.categories
+        order = [facts.get_loc(fact) for fact in FACT_CATEGORIES if fact in facts]
+        order += [code for code in range(len(facts)) if facts[code] not in FACT_CATEGORIES]
+        columns = pd.Index(facts[order], name='fact')
+        if len(positions) == 0 or len(facts) == 0:
+            # Nothing to count (and no fact columns to shape the counts into)
+            index = pd.MultiIndex(levels=levels, codes=[[] for _ in levels], names=row_columns)
+            if group is None:
+                index = index.get_level_values('Feature')
+            return (pd.DataFrame(0, index=index, columns=columns, dtype='int64'),
+                    pd.DataFrame(0.0, index=index, columns=columns))
+
+        # Number the row keys that occur, so the counts scale with the matching rows rather than
+        # with every group x Feature combination
+        keys, rows = np.unique(row_codes[keep], return_inverse=True)
+        cells = rows.reshape(-1) * len(facts) + fact_codes[keep]
+        size = len(keys) * len(facts)
+        rated = ~np.isnan(ranking)
+        counts = np.bincount(cells, minlength=size).reshape(-1, len(facts))
+        rated_counts = np.bincount(rows.reshape(-1)[rated], minlength=len(keys))
+        scores = np.bincount(cells[rated], weights=(ranking[rated] - NEUTRAL_RANKING) / RANKING_SPAN,
+                             minlength=size).reshape(-1, len(facts))
+
+        # Decode the row keys back into category codes per column
+        key_codes = []
+        for categories in reversed(levels):
+            keys, codes = np.divmod(keys, len(categories))
+            key_codes.insert(0, codes)
+        index = pd.MultiIndex(levels=levels, codes=key_codes, names=row_columns)
+        if group is None:
+            index = index.get_level_values('Feature')
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            net = scores[:, order] / rated_counts[:, None]
+        return (pd.DataFrame(counts[:, order], index=index, columns=columns),
+                pd.DataFrame(np.nan_to_num(net), index=index, columns=columns))
+
+    def cube_slice(self, from_date, to_date):
+        days = self.cube['day'].to_numpy()
+        start = days.searchsorted(from_date.to_datetime64(), side='left')
+        stop = days.searchsorted(to_date.to_datetime64(), side='right')
+        return self.cube.iloc[start:stop]
+
+    def rollup_slice(self, granularity, start, stop):
+        # Rollup cells whose bucket starts in [start, stop)
+        rollup = self.rollups[granularity]
+        days = rollup['day'].to_numpy()
+        return rollup.iloc[days.searchsorted(start.to_datetime64()):days.searchsorted(stop.to_datetime64())]
+
+    def trend_cells(self, granularity, from_date, to_date):
+        # Cube cells covering the days from_date..to_date, with 'day' set to the start of their bucket.
+        # Buckets wholly inside the range are read from the rollup; only the partial buckets at either
+        # edge are read from daily cells
+        start = from_date.normalize()
+        stop = to_date.normalize() + pd.Timedelta(days=1)
+        if granularity == 'day':
+            return self.rollup_slice('day', start, stop)
+
+        # [whole_start, whole_stop) is the span of buckets that lie entirely inside the range
+        whole_start = bucket_start(start, granularity)
+        if whole_start < start:
+            whole_start = (start.to_period(ROLLUP_PERIODS[granularity]) + 1).start_time
+        whole_stop = bucket_start(stop, granularity)
+        if whole_start >= whole_stop:
+            parts = [self.rollup_slice('day', start, stop)]
+        else:
+            parts = [
+                self.rollup_slice('day', start, whole_start),
+                self.rollup_slice(granularity, whole_start, whole_stop),
+                self.rollup_slice('day', whole_stop, stop),
+            ]
+        cells = pd.concat(parts, ignore_index=True)
+        return cells.assign(day=bucket_start(cells['day'], granularity))
+
+
+def dataset_version(source):
+    # Identical across worker processes that load the same file, so disk cache entries are shareable
+    return f"{SNAPSHOT_FORMAT}-{source['size']}-{source['mtime_ns']}"
+
+
+# Bytes just before the end of the consumed CSV prefix, fingerprinted to detect rewrites versus appends
+TAIL_CHECK_BYTES = 1 << 16
+
+
+def tail_digest(path, size):
+    start = max(0, size - TAIL_CHECK_BYTES)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(size - start)).hexdigest()
+
+
+def source_state(path, stat):
+    # Where the loaded data came from, recorded so a later reload can tell appends from rewrites.
+    # Only a single CSV gets a tail digest; sharded sources are always reloaded in full
+    files = feedback_source_files(path)
+    state = {
+        'path': path,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'columns': list(pd.read_csv(files[0], nrows=0, encoding='latin1').columns),
+    }
+    if files == [path]:
+        state['tail_digest'] = tail_digest(path, stat.st_size)
+    return state
+
+
+def load_dataset(source_path, snapshot=None, timings=None):
+    # Stat before reading so rows appended while loading are picked up by the next reload. When
+    # given, `timings` gets the seconds spent reading the data and building the derived structures
+    started = time.perf_counter()
+    stat = source_stat(source_path)
+    frame = load_feedback_data(source_path, snapshot)
+    source = source_state(source_path, stat)
+    version = dataset_version(source)
+    saved_rollups = None
+    if pq is not None:
+        saved_rollups = read_rollups(rollups_path(snapshot or snapshot_path), version)
+    loaded = time.perf_counter()
+    ds = FeedbackDataset(frame, version=version, source=source, rollups=saved_rollups)
+    if pq is not None and saved_rollups is None:
+        save_rollups(ds.rollups, snapshot or snapshot_path, version)
+    if timings is not None:
+        timings['data_load'] = loaded - started
+        timings['derived_structures'] = time.perf_counter() - loaded
+    return ds
+
+
+def append_feedback_rows(frame, tail):
+    # Concatenate normalized frames, keeping the date layout
+    merged = concat_feedback_frames([frame, tail])
+    return merged.sort_values('date', kind='stable', na_position='last', ignore_index=True)
+
+
+def load_appended_rows(previous):
+    # Parse only the bytes appended since `previous` was loaded and return (merged frame, source,
+    # appended rows), or None when the file was rewritten (or the new tail is not yet a complete line)
+    source = previous.source
+    path = source['path']
+    if 'tail_digest' not in source:
+        return None
+    stat = os.stat(path)
+    if not source['size'] or stat.st_size <= source['size']:
+        return None
+    if tail_digest(path, source['size']) != source['tail_digest']:
+        return None
+
+    with open(path, 'rb') as f:
+        f.seek(source['size'] - 1)
+        if f.read(1) != b'\n':
+            return None
+        tail = f.read(stat.st_size - source['size'])
+
+    # Stop at the last complete line; a half-written row is picked up by the next reload
+    complete = tail.rfind(b'\n') + 1
+    if not complete:
+        return None
+    tail = tail[:complete]
+
+    parsed = pd.read_csv(io.BytesIO(tail), header=None, names=source['columns'], encoding='latin1',
+                         usecols=lambda column: column in FEEDBACK_COLUMNS, dtype=FEEDBACK_DTYPES)
+    first_row_id = int(previous.frame['row_id'].max()) + 1 if len(previous.frame) else 0
+    appended = normalize_feedback_frame(parsed, first_row_id)
+    frame = append_feedback_rows(previous.frame, appended)
+
+    consumed = source['size'] + complete
+    new_source = dict(source, size=consumed, mtime_ns=stat.st_mtime_ns, tail_digest=tail_digest(path, consumed))
+    return frame, new_source, appended
+
+
+# Arrow IPC file holding the dataset for every worker process; None keeps a private copy per process
+shared_dataset_path = None
+SHARED_METADATA_KEY = b'feedback_shared'
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    # Exclusive advisory lock across processes (a no-op where fcntl is unavailable)
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_shared_metadata(path):
+    try:
+        with pa.memory_map(path, 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowException):
+        return None
+    raw = metadata.get(SHARED_METADATA_KEY)
+    return json.loads(raw) if raw else None
+
+
+def publish_shared_dataset(ds, path):
+    # Write the canonical frame plus the row-sized index/ranking arrays as one uncompressed Arrow
+    # IPC file that worker processes memory-map instead of holding private copies
+    table = pa.Table.from_pandas(ds.frame, preserve_index=False)
+    for column, order in ds.index_orders.items():
+        table = table.append_column(f'__index__{column}', pa.array(order))
+    for name, order in ds.rankings.items():
+        table = table.append_column(f'__ranking__{name}', pa.array(order))
+    metadata = dict(table.schema.metadata or {})
+    metadata[SHARED_METADATA_KEY] = json.dumps({
+        'format': SNAPSHOT_FORMAT, 'version': ds.version, 'source': ds.source,
+    }).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Replace rather than overwrite: processes still mapping the old file keep a valid view of it
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def shared_column(table, name):
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=True)
+    return column.to_numpy()
+
+
+def shared_types(arrow_type):
+    # Keep text as Arrow-backed strings so it stays in the mapped pages instead of becoming Python objects
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def attach_shared_dataset(path, rollups=None):
+    # Map the shared file and build a dataset over it without copying the large columns. The rollups
+    # are not in the file: pass the publisher's, otherwise they are read from next to the snapshot
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    metadata = json.loads(table.schema.metadata[SHARED_METADATA_KEY])
+    shared = {'index': {}, 'rankings': {}}
+    frame_columns = []
+    for name in table.column_names:
+        if name.startswith('__index__'):
+            shared['index'][name[len('__index__'):]] = shared_column(table, name)
+        elif name.startswith('__ranking__'):
+            shared['rankings'][name[len('__ranking__'):]] = shared_column(table, name)
+        else:
+            frame_columns.append(name)
+    frame = table.select(frame_columns).to_pandas(split_blocks=True, types_mapper=shared_types)
+    if rollups is None and pq is not None:
+        rollups = read_rollups(rollups_path(snapshot_path), metadata['version'])
+    return FeedbackDataset(frame, version=metadata['version'], source=metadata['source'], shared=shared,
+                           rollups=rollups)
+
+
+def shared_dataset_is_current(metadata, source_path):
+    if not metadata or metadata.get('format') != SNAPSHOT_FORMAT:
+        return False
+    source = metadata['source']
+    stat = source_stat(source_path)
+    return source['path'] == source_path and (source['size'], source['mtime_ns']) == (stat.st_size, stat.st_mtime_ns)
+
+
+def open_shared_dataset(source_path, path):
+    # The first process to get here builds and publishes the file; everyone else just maps it
+    rollups = None
+    with file_lock(f'{path}.lock'):
+        if not shared_dataset_is_current(read_shared_metadata(path), source_path):
+            ds = load_dataset(source_path)
+            publish_shared_dataset(ds, path)
+            rollups = ds.rollups
+    return attach_shared_dataset(path, rollups)
+
+
+# The live dataset; loaded by create_app(), possibly on dataset_loader in the background, which
+# leaves the reason in dataset_load_error if it fails. dataset_loader_pid is the process the loader
+# runs in: a worker forked mid-load (gunicorn --preload) starts its own, see ensure_dataset_loader()
+dataset = None
+dataset_loader = None
+dataset_loader_pid = None
+loader_config = None
+dataset_load_error = None
+dataset_lock = threading.Lock()
+reload_lock = threading.Lock()
+
+
+def current_dataset():
+    # Callbacks take the snapshot once and use it throughout, so a concurrent swap never mixes versions
+    if dataset is None and dataset_loader is not None:
+        # The first version is still loading in the background
+        dataset_loader.join()
+        if dataset is None:
+            raise RuntimeError('The feedback dataset failed to load') from dataset_load_error
+    return dataset
+
+
+def swap_dataset(new_dataset):
+    global dataset
+    with dataset_lock:
+        dataset = new_dataset
+    result_cache.clear()
+    metrics.set('feedback_dataset_rows', new_dataset.row_count)
+    logger.info('Swapped in dataset version %s (%d rows)', new_dataset.version, new_dataset.row_count)
+    if SEARCH_INDEX_WARMUP and new_dataset.frame is not None:
+        # Build the search index off the request path instead of on the first search
+        threading.Thread(target=lambda: new_dataset.text_index, name='search-index-warmup', daemon=True).start()
+
+
+def build_next_dataset(previous, force=False):
+    # The dataset for the CSV's current state, or None when it has not changed since `previous`
+    stat = source_stat(previous.source['path'])
+    if not force and (stat.st_size, stat.st_mtime_ns) == (previous.source['size'], previous.source['mtime_ns']):
+        return None
+
+    appended = None if force else load_appended_rows(previous)
+    if appended is None:
+        return load_dataset(previous.source['path'])
+
+    frame, source, tail = appended
+    key = {'format': SNAPSHOT_FORMAT, 'size': source['size'], 'mtime_ns': source['mtime_ns']}
+    if pq is not None and source['size'] == stat.st_size:
+        try:
+            write_snapshot(frame, snapshot_path, key)
+        except (OSError, pa.ArrowException):
+            logger.warning('Could not write snapshot %s', snapshot_path, exc_info=True)
+    rollups = update_rollups(previous.rollups, tail, frame)
+    version = dataset_version(source)
+    if pq is not None:
+        # Lets workers attaching this version (and the next warm start) skip re-aggregating
+        save_rollups(rollups, snapshot_path, version)
+    return FeedbackDataset(frame, version=version, source=source, rollups=rollups)
+
+
+def refresh_shared_dataset(force=False):
+    # Under the cross-process lock: adopt a version another worker already published, then rebuild
+    # and publish if the CSV has moved on since
+    changed = False
+    with file_lock(f'{shared_dataset_path}.lock'):
+        previous = current_dataset()
+        metadata = read_shared_metadata(shared_dataset_path)
+        if metadata is not None and metadata['version'] != previous.version:
+            previous = attach_shared_dataset(shared_dataset_path)
+            swap_dataset(previous)
+            changed = True
+
+        next_dataset = build_next_dataset(previous, force)
+        if next_dataset is not None:
+            publish_shared_dataset(next_dataset, shared_dataset_path)
+            swap_dataset(attach_shared_dataset(shared_dataset_path, next_dataset.rollups))
+            changed = True
+    return changed
+
+
+def reload_dataset(force=False):
+    # Build the next snapshot off to the side and swap it in; returns True when a new version went live
+    if not reload_lock.acquire(blocking=False):
+        return False
+    try:
+        started = time.perf_counter()
+        if not query_backend.in_memory:
+            # The database is the dataset: rebuild it first, then swap in the aggregates read from the
+            # new file, so no result read from the old database is cached under the new version
+            path = current_dataset().source['path']
+            changed = query_backend.refresh(path, force)
+            if changed:
+                swap_dataset(query_backend.read_dataset(path))
+        elif shared_dataset_path:
+            changed = refresh_shared_dataset(force)
+        else:
+            next_dataset = build_next_dataset(current_dataset(), force)
+            if next_dataset is not None:
+                swap_dataset(next_dataset)
+            changed = next_dataset is not None
+        if changed:
+            metrics.observe('feedback_dataset_load_seconds', time.perf_counter() - started, kind='reload')
+        return changed
+    finally:
+        reload_lock.release()
+
+
+# The process running the dataset watcher and its poll interval. Threads do not survive fork, so a
+# worker forked after create_app() (gunicorn --preload) starts its own, see ensure_dataset_watcher()
+watcher_pid = None
+watch_interval = 0
+# Serializes starting the loader and watcher in a forked worker
+worker_threads_lock = threading.Lock()
+
+
+def watch_dataset(interval):
+    # Poll the CSV's size/mtime and reload in the background whenever it changes
+    global watcher_pid, watch_interval
+
+    def poll():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_dataset()
+            except Exception:
+                logger.exception('Dataset reload failed; keeping version %s', current_dataset().version)
+
+    thread = threading.Thread(target=poll, name='dataset-watcher', daemon=True)
+    watcher_pid, watch_interval = os.getpid(), interval
+    thread.start()
+    return thread
+
+
+def ensure_dataset_watcher():
+    # Start this process's watcher when it was forked from a process that had one
+    if watch_interval > 0 and watcher_pid != os.getpid():
+        with worker_threads_lock:
+            if watcher_pid != os.getpid():
+                watch_dataset(watch_interval)
+
+
+def reset_after_fork():
+    # In a forked child: replace the locks a parent thread may have held at the fork, and drop the
+    # parent's SQLite connections, which must not be used across a fork
+    global dataset_lock, reload_lock, worker_threads_lock
+    dataset_lock = threading.Lock()
+    reload_lock = threading.Lock()
+    worker_threads_lock = threading.Lock()
+    if not query_backend.in_memory:
+        query_backend.forget_connections()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+
+
+# Orderings of feedback_page as SQL sort terms, mirroring FEEDBACK_RANKINGS with ties in row
+# position order (date, undated last, then CSV order)
+POSITION_ORDER = [('date IS NULL', True), ('date', True), ('row_id', True)]
+SQL_RANKINGS = {
+    'words': [('word_count', False)] + POSITION_ORDER,
+    'newest': [('date IS NULL', True), ('date', False), ('row_id', True)],
+    'critical': [('CriticalRanking IS NULL', True), ('CriticalRanking', True)] + POSITION_ORDER,
+}
+
+
+class PandasBackend:
+    # Answers the callbacks' structured queries from the in-memory dataset
+    name = 'pandas'
+    in_memory = True
+
+    def refresh(self, source_path, force=False):
+        return False
+
+    def count_by(self, columns, filters=None, from_date=None, to_date=None):
+        # Row counts grouped by `columns`, as a Series indexed by them
+        filters = filters or {}
+        ds = current_dataset()
+        if from_date is not None and to_date is not None and set(columns) | set(filters) <= set(CUBE_DIMENSIONS):
+            # Pre-aggregated cube cells; its size depends on distinct combinations, not rows
+            cube = ds.cube_slice(from_date, to_date)
+            mask = pd.Series(True, index=cube.index)
+            for column, values in filters.items():
+                mask &= cube[column].isin(values)
+            count_rows(len(cube), int(mask.sum()))
+            return cube[mask].groupby(columns, observed=True)['count'].sum()
+        if len(columns) == 1 and list(filters) == [NESTED_PARENTS.get(columns[0])] and from_date is None and to_date is None:
+            # Dropdown hierarchies are precomputed in the catalog
+            counts = merged_counts(ds.catalog[NESTED_CATALOG[columns[0]]], filters[NESTED_PARENTS[columns[0]]])
+            return pd.Series(counts, dtype='int64').rename_axis(columns[0])
+        rows = ds.select(filters, from_date, to_date, columns=columns)
+        return rows.groupby(columns, observed=True).size()
+
+    def feedback_page(self, model, ranking='words', descending=True, sort_column=None, clauses=(), offset=0, limit=10):
+        # One page of a model's feedback rows and the number of rows matching the clauses
+        ds = current_dataset()
+        positions = ds.ranked_rows(model, ranking)
+        if not descending:
+            positions = positions[::-1]
+
+        if not clauses and sort_column is None:
+            # Plain paging: slice the precomputed run and only touch the rows on this page
+            return ds.frame.take(positions[offset:offset + limit]), len(positions)
+
+        rows = ds.frame.take(positions)
+        if clauses:
+            rows = filter_feedback_rows(rows, clauses)
+        if sort_column is not None:
+            rows = rows.sort_values(sort_column, ascending=not descending, kind='stable')
+        return rows.iloc[offset:offset + limit], len(rows)
+
+    def row(self, row_id):
+        return current_dataset().row(row_id)
+
+    def trend_counts(self, granularity, filters=None, from_date=None, to_date=None):
+        # Row counts per (bucket start, fact) for the days from_date..to_date, read from the rollups
+        cells = current_dataset().trend_cells(granularity, from_date, to_date)
+        mask = pd.Series(True, index=cells.index)
+        for column, values in (filters or {}).items():
+            mask &= cells[column].isin(values)
+        count_rows(len(cells), int(mask.sum()))
+        return cells[mask].groupby(['day', 'fact'], observed=True)['count'].sum()
+
+    def sentiment_crosstab(self, group=None, filters=None, from_date=None, to_date=None):
+        return current_dataset().sentiment_crosstab(group, filters, from_date, to_date)
+
+
+# Columns of the feedback table in the SQLite backend, and the ones given their own index
+SQLITE_COLUMNS = ['row_id', 'brand', 'model', 'Feature', 'fact', 'source', 'segment', 'date',
+                  'CriticalRanking', 'feedback', 'Summary', 'word_count']
+SQLITE_INDEXED_COLUMNS = ['brand', 'model', 'Feature', 'fact', 'source', 'date']
+SQLITE_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def sql_date(value):
+    # Dates are stored as ISO text, so date-only bounds compare correctly as strings
+    return value.strftime('%Y-%m-%d')
+
+
+def sql_filters(filters=None, from_date=None, to_date=None, date_column='date'):
+    # WHERE clauses and parameters for structured filters; column names come from a fixed set
+    clauses, params = [], []
+    for column, values in (filters or {}).items():
+        if column not in SQLITE_COLUMNS:
+            raise ValueError(f'Unknown column {column}')
+        clauses.append(f'"{column}" IN ({", ".join("?" * len(values))})')
+        params.extend(values)
+    if from_date is not None:
+        clauses.append(f'{date_column} >= ?')
+        params.append(sql_date(from_date))
+    if to_date is not None:
+        clauses.append(f'{date_column} < ?')
+        params.append(sql_date(to_date.normalize() + pd.Timedelta(days=1)))
+    return clauses, params
+
+
+SQL_OPERATORS = {'eq': '=', 'ge': '>=', 'le': '<=', 'lt': '<', 'gt': '>'}
+
+
+def sql_clause(name, operator, value):
+    # One parsed DataTable filter clause as SQL, matching filter_feedback_rows
+    if name == 'date':
+        if operator == 'datestartswith':
+            return "date LIKE ? ESCAPE '\\'", [sql_like(value) + '%']
+        value = pd.to_datetime(value, errors='coerce')
+        if pd.isna(value):
+            return None, []
+        value = value.strftime(SQLITE_DATE_FORMAT)
+    elif operator in ('contains', 'datestartswith'):
+        return f"\"{name}\" LIKE ? ESCAPE '\\'", ['%' + sql_like(value) + '%']
+    if operator == 'ne':
+        return f'("{name}" IS NULL OR "{name}" != ?)', [value]
+    return f'"{name}" {SQL_OPERATORS[operator]} ?', [value]
+
+
+def sql_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def sqlite_summary(connection, source_path):
+    # What the views read besides query results (the catalog, top features, row count and CSV
+    # columns), aggregated once while building the database and stored in it
+    def grouped(columns):
+        names = ', '.join(f'"{column}"' for column in columns)
+        present = ' AND '.join(f'"{column}" IS NOT NULL' for column in columns)
+        counts = pd.read_sql_query(f'SELECT {names}, COUNT(*) AS count FROM feedback WHERE {present} GROUP BY {names}',
+                                   connection)
+        return counts.set_index(columns)['count']
+
+    catalog = option_catalog(
+        {column: {value: int(count) for value, count in grouped([column]).items()} for column in CATALOG_COLUMNS},
+        nest_counts(grouped(['brand', 'model'])),
+        nest_counts(grouped(['model', 'Feature'])),
+    )
+    totals = pd.read_sql_query(
+        'SELECT model, Feature, '
+        'TOTAL(CASE WHEN CriticalRanking > :neutral THEN CriticalRanking END) AS positive_sum, '
+        'COUNT(CASE WHEN CriticalRanking > :neutral THEN 1 END) AS positive_rows, '
+        'TOTAL(CASE WHEN CriticalRanking < :neutral THEN CriticalRanking END) AS negative_sum, '
+        'COUNT(CASE WHEN CriticalRanking < :neutral THEN 1 END) AS negative_rows '
+        'FROM feedback WHERE model IS NOT NULL AND Feature IS NOT NULL GROUP BY model, Feature',
+        connection, params={'neutral': NEUTRAL_RANKING},
+    )
+    return {
+        'catalog': catalog,
+        'top_features': rank_top_features(totals),
+        'row_count': connection.execute('SELECT COUNT(*) FROM feedback').fetchone()[0],
+        'columns': list(pd.read_csv(feedback_source_files(source_path)[0], nrows=0, encoding='latin1').columns),
+    }
+
+
+def build_sqlite_database(source_path, path, key):
+    # Stream the source's CSV chunks into a fresh database next to `path`, index it, then swap it in
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute('PRAGMA journal_mode=OFF')
+        connection.execute('PRAGMA synchronous=OFF')
+        connection.execute(
+            'CREATE TABLE feedback (row_id INTEGER PRIMARY KEY, brand TEXT, model TEXT, Feature TEXT, fact TEXT, '
+            'source TEXT, segment TEXT, date TEXT, CriticalRanking INTEGER, feedback TEXT, Summary TEXT, '
+            'word_count INTEGER)'
+        )
+        insert = f'INSERT INTO feedback VALUES ({", ".join("?" * len(SQLITE_COLUMNS))})'
+        row_id = 0
+        for file in feedback_source_files(source_path):
+            for chunk in pd.read_csv(file, encoding='latin1', usecols=lambda column: column in FEEDBACK_COLUMNS,
+                                     dtype=FEEDBACK_DTYPES, chunksize=INGEST_CHUNK_ROWS):
+                chunk = compact_feedback_frame(chunk)
+                chunk['row_id'] = np.arange(row_id, row_id + len(chunk), dtype=np.int64)
+                row_id += len(chunk)
+                chunk['date'] = chunk['date'].dt.strftime(SQLITE_DATE_FORMAT)
+                rows = chunk.reindex(columns=SQLITE_COLUMNS).astype(object)
+                connection.executemany(insert, rows.where(rows.notna(), None).itertuples(index=False, name=None))
+
+        for column in SQLITE_INDEXED_COLUMNS:
+            connection.execute(f'CREATE INDEX feedback_{column.lower()} ON feedback ("{column}")')
+        # Per-model paging in ranking order reads these instead of sorting
+        connection.execute('CREATE INDEX feedback_model_words ON feedback (model, word_count)')
+        connection.execute('CREATE INDEX feedback_model_date ON feedback (model, date)')
+
+        # Daily counts per dimension combination, the SQL twin of the sentiment cube
+        dimensions = ', '.join(f'"{column}"' for column in CUBE_DIMENSIONS)
+        connection.execute(
+            f'CREATE TABLE cube AS SELECT {dimensions}, substr(date, 1, 10) AS day, COUNT(*) AS count '
+            f'FROM feedback WHERE model IS NOT NULL AND fact IS NOT NULL AND date IS NOT NULL '
+            f'GROUP BY {dimensions}, day'
+        )
+        connection.execute('CREATE INDEX cube_day ON cube (day)')
+        connection.execute('CREATE TABLE meta (key TEXT, summary TEXT)')
+        connection.execute('INSERT INTO meta VALUES (?, ?)',
+                           (json.dumps(key), json.dumps(sqlite_summary(connection, source_path))))
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+
+
+# Trend buckets as SQL over the cube's ISO days: the day itself, the Monday starting its week, or
+# the first of its month
+SQL_BUCKETS = {
+    'day': 'day',
+    'week': "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')",
+    'month': "substr(day, 1, 7) || '-01'",
+}
+
+
+class SQLiteBackend:
+    # Answers the same queries from an indexed SQLite file built from the CSV chunk by chunk, so
+    # filters, group-bys and paging run in the database and only their results reach Python. The
+    # rows are never loaded into memory; read_dataset() supplies the aggregates the views need
+    name = 'sqlite'
+    in_memory = False
+
+    def __init__(self, path):
+        self.path = path
+        self._key = None
+        self._generation = 0
+        self._local = threading.local()
+
+    def stored_key(self):
+        try:
+            connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+            try:
+                # A file without the summary predates it and is rebuilt
+                return json.loads(connection.execute('SELECT key, summary FROM meta').fetchone()[0])
+            finally:
+                connection.close()
+        except (sqlite3.Error, TypeError):
+            return None
+
+    def refresh(self, source_path, force=False):
+        # Build the database, or rebuild it when the source changed (or when forced); returns True
+        # when it differs from the one this process last used. The first worker to get here builds
+        # the file; the others wait and reuse it
+        key = csv_fingerprint(source_path)
+        rebuilt = False
+        with file_lock(f'{self.path}.lock'):
+            if force or self.stored_key() != key:
+                logger.info('Building SQLite database %s from %s', self.path, source_path)
+                build_sqlite_database(source_path, self.path, key)
+                rebuilt = True
+        if not rebuilt and key == self._key:
+            return False
+        # Threads reconnect on their next query and see the new file
+        self._key = key
+        self._generation += 1
+        return True
+
+    def read_dataset(self, source_path):
+        # The live dataset for the current database file, from the summary stored in it; no rows are
+        # read into memory
+        raw_key, raw_summary = self.connection().execute('SELECT key, summary FROM meta').fetchone()
+        key, summary = json.loads(raw_key), json.loads(raw_summary)
+        return SQLiteDataset(
+            version=f'sqlite-{dataset_version(key)}',
+            source={'path': source_path, 'size': key['size'], 'mtime_ns': key['mtime_ns'], 'columns': summary['columns']},
+            row_count=summary['row_count'],
+            catalog=summary['catalog'],
+            # JSON has no tuples
+            top_features={model: tuple(features) for model, features in summary['top_features'].items()},
+        )
+
+    def forget_connections(self):
+        # Every thread opens a new connection on its next query
+        self._local = threading.local()
+
+    def connection(self):
+        local = self._local
+        if getattr(local, 'generation', None) != self._generation:
+            if getattr(local, 'connection', None) is not None:
+                local.connection.close()
+            local.connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+            local.generation = self._generation
+        return local.connection
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.connection(), params=params)
+
+    def count_by(self, columns, filters=None, from_date=None, to_date=None):
+        filters = filters or {}
+        names = ', '.join(f'"{column}"' for column in columns)
+        if from_date is not None and to_date is not None and set(columns) | set(filters) <= set(CUBE_DIMENSIONS):
+            table, measure, date_column = 'cube', 'SUM(count)', 'day'
+        else:
+            table, measure, date_column = 'feedback', 'COUNT(*)', 'date'
+        clauses, params = sql_filters(filters, from_date, to_date, date_column)
+        clauses += [f'"{column}" IS NOT NULL' for column in columns]
+        counts = self.query(f'SELECT {names}, {measure} AS count FROM {table} WHERE {" AND ".join(clauses)} '
+                            f'GROUP BY {names}', params)
+        count_rows(len(counts), len(counts))
+        return counts.set_index(columns)['count']
+
+    def feedback_page(self, model, ranking='words', descending=True, sort_column=None, clauses=(), offset=0, limit=10):
+        where, params = ['model = ?'], [model]
+        for name, operator, value in clauses:
+            clause, values = sql_clause(name, operator, value)
+            if clause is not None:
+                where.append(clause)
+                params.extend(values)
+        terms = [(term, ascending == descending) for term, ascending in SQL_RANKINGS[ranking]]
+        if sort_column is not None:
+            if sort_column not in SQLITE_COLUMNS:
+                raise ValueError(f'Unknown column {sort_column}')
+            # Like pandas, empty values sort last in either direction
+            terms[:0] = [(f'"{sort_column}" IS NULL', True), (f'"{sort_column}"', not descending)]
+        order = ', '.join(f'{term} {"ASC" if ascending else "DESC"}' for term, ascending in terms)
+        condition = ' AND '.join(where)
+
+        total = self.connection().execute(f'SELECT COUNT(*) FROM feedback WHERE {condition}', params).fetchone()[0]
+        rows = self.query(f'SELECT * FROM feedback WHERE {condition} ORDER BY {order} LIMIT ? OFFSET ?',
+                          params + [limit, offset])
+        count_rows(total, len(rows))
+        return rows.assign(date=pd.to_datetime(rows['date'], errors='coerce')), total
+
+    def row(self, row_id):
+        rows = self.query('SELECT * FROM feedback WHERE row_id = ?', [int(row_id)])
+        if rows.empty:
+            return None
+        return rows.assign(date=pd.to_datetime(rows['date'], errors='coerce')).iloc[0]
+
+    def trend_counts(self, granularity, filters=None, from_date=None, to_date=None):
+        # Summed cube cells per (bucket start, fact), bucketed in the database
+        clauses, params = sql_filters(filters, from_date, to_date, 'day')
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        counts = self.query(f'SELECT {SQL_BUCKETS[granularity]} AS bucket, fact, SUM(count) AS count FROM cube '
+                            f'{where} GROUP BY bucket, fact', params)
+        count_rows(len(counts), len(counts))
+        return counts.assign(day=pd.to_datetime(counts['bucket'])).set_index(['day', 'fact'])['count']
+
+    def sentiment_crosstab(self, group=None, filters=None, from_date=None, to_date=None):
+        # Feature x fact row counts and net sentiment contributions, as FeedbackDataset.sentiment_crosstab,
+        # from one grouped query
+        row_columns = ['Feature'] if group is None else [group, 'Feature']
+        if group is not None and group not in SQLITE_COLUMNS:
+            raise ValueError(f'Unknown column {group}')
+        names = ', '.join(f'"{column}"' for column in row_columns)
+        clauses, params = sql_filters(filters, from_date, to_date)
+        clauses += [f'"{column}" IS NOT NULL' for column in row_columns + ['fact']]
+        cells = self.query(f'SELECT {names}, fact, COUNT(*) AS count, COUNT(CriticalRanking) AS rated, '
+                           f'TOTAL(CriticalRanking - ?) AS score FROM feedback WHERE {" AND ".join(clauses)} '
+                           f'GROUP BY {names}, fact ORDER BY {names}', [NEUTRAL_RANKING] + params)
+        count_rows(len(cells), len(cells))
+
+        # Every fact in the data, in display order, as in the in-memory crosstab
+        facts = [fact for (fact,) in self.connection().execute(
+            'SELECT DISTINCT fact FROM feedback WHERE fact IS NOT NULL ORDER BY fact')]
+        order = [fact for fact in FACT_CATEGORIES if fact in facts]
+        order += [fact for fact in facts if fact not in FACT_CATEGORIES]
+        columns = pd.Index(order, name='fact')
+        if cells.empty:
+            index = pd.MultiIndex.from_arrays([[] for _ in row_columns], names=row_columns)
+            if group is None:
+                index = index.get_level_values('Feature')
+            return (pd.DataFrame(0, index=index, columns=columns, dtype='int64'),
+                    pd.DataFrame(0.0, index=index, columns=columns))
+
+        cells = cells.set_index(row_columns + ['fact'])
+        counts = cells['count'].unstack('fact', fill_value=0).reindex(columns=columns, fill_value=0)
+        rated = cells['rated'].groupby(level=row_columns).sum()
+        scores = (cells['score'] / RANKING_SPAN).unstack('fact', fill_value=0).reindex(columns=columns, fill_value=0)
+        net = scores.div(rated, axis=0).fillna(0.0)
+        return counts, net
+
+
+class SQLiteDataset:
+    # Stands in for FeedbackDataset while the SQLite backend holds the data: the version, catalog and
+    # top features the views read. No rows are held in memory, so frame is None
+    frame = None
+
+    def __init__(self, version, source, row_count, catalog, top_features):
+        self.version = version
+        self.source = source
+        self.row_count = row_count
+        self.catalog = catalog
+        self.top_features = top_features
+
+
+def make_query_backend(name, sqlite_path=None):
+    if name == 'sqlite':
+        return SQLiteBackend(sqlite_path)
+    if name != 'pandas':
+        raise ValueError(f'Unknown query backend {name!r}')
+    return PandasBackend()
+
+
+# Where the callbacks run their queries; set by create_app()
+query_backend = PandasBackend()
+
+
+def current_backend():
+    # The query backend, once the first dataset version (whose load picks the backend) is live
+    current_dataset()
+    return query_backend
+
+
+class ResultCache:
+    # Thread-safe LRU cache of callback results, optionally mirrored to a directory shared by workers
+    def __init__(self, max_entries=256, directory=None, max_disk_entries=4096):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest() + '.pkl')
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+
+        if self.directory:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            self._write_disk(key, value)
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _write_disk(self, key, value):
+        path = self._disk_path(key)
+        tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError):
+            logger.warning('Could not write cache entry %s', path, exc_info=True)
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 64 == 0
+        if prune:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        # Drop the least recently written files once the shared store grows past its bound
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.pkl')]
+        except OSError:
+            return
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            else:
+                with self._lock:
+                    self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+result_cache = ResultCache(
+    max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 256)),
+    directory=os.environ.get('RESULT_CACHE_DIR') or None,
+)
+
+
+def normalize_selection(values):
+    # Order-insensitive selection; no selection and "All" both mean unfiltered
+    if not values or 'All' in values:
+        return ()
+    return tuple(sorted(set(values)))
+
+
+def normalize_date(value):
+    date = pd.to_datetime(value, errors='coerce') if value else None
+    return None if date is None or pd.isna(date) else date.strftime('%Y-%m-%d')
+
+
+def cached_result(normalize):
+    # Memoize a callback on (callback, dataset version, normalized filter state)
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            version = current_dataset().version
+            key = (func.__name__, version) + normalize(*args)
+            found, value = result_cache.get(key)
+            if found:
+                return value
+            value = func(*args)
+            # Don't file a result computed against a newer snapshot under the old version
+            if current_dataset().version == version:
+                result_cache.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+BYTE_BUCKETS = (1024, 16384, 131072, 1048576, 8388608, 67108864)
+
+
+class Metrics:
+    # Thread-safe counters, gauges and histograms rendered in the Prometheus text format. Each worker
+    # process keeps its own values, so scrape every worker (or run a single one) to see them all
+    def __init__(self):
+        self._families = OrderedDict()
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, kind, help_text, buckets=None):
+        self._families[name] = (kind, help_text, buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        buckets = self._families[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, then +Inf, sum and count
+                counts = self._values[key] = [0] * (len(buckets) + 3)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-3] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self):
+        with self._lock:
+            values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        lines = []
+        for name, (kind, help_text, buckets) in self._families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (family, labels), value in sorted(values.items(), key=lambda item: item[0]):
+                if family != name:
+                    continue
+                if kind != 'histogram':
+                    lines.append(f'{name}{prometheus_labels(labels)} {value}')
+                    continue
+                for bound, count in zip(buckets + ('+Inf',), value):
+                    lines.append(f'{name}_bucket{prometheus_labels(labels + (("le", bound),))} {count}')
+                lines.append(f'{name}_sum{prometheus_labels(labels)} {value[-2]}')
+                lines.append(f'{name}_count{prometheus_labels(labels)} {value[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+def prometheus_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+metrics = Metrics()
+metrics.describe('dash_callback_duration_seconds', 'histogram', 'Wall time of Dash callback requests.', LATENCY_BUCKETS)
+metrics.describe('dash_callback_rows_scanned', 'histogram', 'Dataset rows or cube cells examined per callback request.', ROW_BUCKETS)
+metrics.describe('dash_callback_rows_returned', 'histogram', 'Dataset rows or cube cells matched per callback request.', ROW_BUCKETS)
+metrics.describe('dash_callback_response_bytes', 'histogram', 'Serialized size of Dash callback responses.', BYTE_BUCKETS)
+metrics.describe('dash_callback_errors_total', 'counter', 'Dash callback requests that failed.')
+metrics.describe('feedback_dataset_load_seconds', 'histogram', 'Time to load the dataset at startup or reload it.', LATENCY_BUCKETS)
+metrics.describe('feedback_dataset_rows', 'gauge', 'Rows in the live dataset.')
+metrics.describe('dash_app_startup_seconds', 'gauge', 'Time spent in each phase of the app startup.')
+
+# Seconds per startup phase: import (libraries), module_setup and callback_registration (the rest of
+# importing this module), then data_load, derived_structures, query_backend and app_setup in create_app()
+startup_timings = {}
+
+
+def record_startup(phase, seconds):
+    startup_timings[phase] = round(seconds, 4)
+    metrics.set('dash_app_startup_seconds', seconds, phase=phase)
+
+# Row counters of the callback request running in this context, or None outside callbacks
+query_stats = contextvars.ContextVar('query_stats', default=None)
+
+
+def count_rows(scanned, returned):
+    stats = query_stats.get()
+    if stats is not None:
+        stats['scanned'] += scanned
+        stats['returned'] += returned
+
+
+class SlowCallbackProfiler:
+    # Sampling profiler for slow callbacks: once a callback has been running for `threshold` seconds,
+    # its thread's stack is sampled every `interval` seconds until it returns. Stacks are kept in the
+    # collapsed "frame;frame;frame count" format that flame graph tools read
+    def __init__(self, threshold=0.0, interval=0.005, keep=20):
+        self.threshold = threshold
+        self.interval = interval
+        self.profiles = deque(maxlen=keep)
+        self._running = {}
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def start(self, name):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._running[threading.get_ident()] = (name, time.perf_counter(), Counter())
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name='callback-profiler', daemon=True)
+                self._sampler.start()
+
+    def stop(self):
+        with self._lock:
+            running = self._running.pop(threading.get_ident(), None)
+        if running is None or not running[2]:
+            return
+        name, started, stacks = running
+        profile = {
+            'callback': name,
+            'duration_s': round(time.perf_counter() - started, 4),
+            'samples': sum(stacks.values()),
+            'stacks': [f'{stack} {count}' for stack, count in stacks.most_common(50)],
+        }
+        self.profiles.append(profile)
+        logger.warning('Slow callback %s took %.3fs; hottest stack: %s',
+                       name, profile['duration_s'], profile['stacks'][0])
 
-# Load CSV data
-csv_path = r"Test Try 2.csv"
-df = pd.read_csv(csv_path, encoding='latin1')
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, (_, started, stacks) in self._running.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and now - started >= self.threshold:
+                        stacks[collapsed_stack(frame)] += 1
 
-# Initialize the Dash app
-app = Dash(__name__, suppress_callback_exceptions=True)
 
-# Configure CORS
-CORS(app.server, resources={r"/": {"origins": ""}})
+def collapsed_stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+# Sample stacks of callbacks running longer than this many milliseconds (0 disables)
+profiler = SlowCallbackProfiler(threshold=float(os.environ.get('CALLBACK_PROFILE_THRESHOLD_MS', 0)) / 1000)
+
+
+# Reload the dataset in the background when the CSV changes (0 disables polling)
+DATASET_RELOAD_INTERVAL = float(os.environ.get('DATASET_RELOAD_INTERVAL', 0))
+# Admin routes require this in an X-Admin-Token header; without it they are disabled
+DATASET_ADMIN_TOKEN = os.environ.get('DATASET_ADMIN_TOKEN')
+
+# JSON data API for the React client (set REACT_APP_API_BASE_URL to this prefix on the Dash server)
+API_PREFIX = os.environ.get('API_PREFIX', '/api')
+
+# Run the heavy callbacks as background jobs in worker processes, handing results back through a
+# local diskcache store, so a slow query never holds a server thread (1 enables)
+BACKGROUND_CALLBACKS = os.environ.get('BACKGROUND_CALLBACKS', '0') == '1'
+BACKGROUND_CACHE_DIR = os.environ.get('BACKGROUND_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'dash_app_background')
+
+
+def background_callback_manager():
+    if not BACKGROUND_CALLBACKS:
+        return None
+    # Imported here so the default (inline) mode never loads them; they need the dash[diskcache] extra
+    try:
+        import diskcache
+        # Jobs run in child processes whose result_cache entries die with them, so results are
+        # memoized by the manager instead, per dataset version and callback inputs
+        return dash.DiskcacheManager(diskcache.Cache(BACKGROUND_CACHE_DIR), expire=600,
+                                     cache_by=[lambda: current_dataset().version])
+    except ImportError as exc:
+        logger.warning("Background callbacks need dash[diskcache] (%s); running callbacks inline", exc)
+        return None
+
+
+background_manager = background_callback_manager()
+
+
+def heavy_callback(outputs, inputs, preview):
+    # Register a slow callback. In background mode the job first publishes preview(*args) as its
+    # progress, then the exact result; a request whose inputs change again cancels the running job
+    def decorator(func):
+        if background_manager is None:
+            return callback(outputs, inputs)(func)
+
+        def run_in_background(set_progress, *args):
+            set_progress(preview(*args))
+            return func(*args)
+
+        callback(outputs, inputs, background=True, manager=background_manager,
+                 progress=outputs, cancel=inputs)(run_in_background)
+        return func
+    return decorator
+
+
+# Operational routes on the Flask server
+admin = Blueprint('admin', __name__)
+
+
+@admin.route('/cache-stats')
+def cache_stats():
+    return result_cache.stats()
+
+
+@admin.route('/startup-stats')
+def startup_stats():
+    return startup_timings
+
+
+@admin.route('/healthz')
+def healthz():
+    # 503 until the first dataset version is live, and for good if loading it failed, so a load
+    # balancer never routes to a worker that can only answer with errors
+    if dataset is not None:
+        return {'status': 'ok', 'version': dataset.version}
+    if dataset_load_error is not None:
+        return {'status': 'failed', 'error': repr(dataset_load_error)}, 503
+    return {'status': 'loading'}, 503
+
+
+@admin.before_app_request
+def start_worker_threads():
+    # A worker forked from a preloaded master has none of the master's threads
+    ensure_dataset_loader()
+    ensure_dataset_watcher()
+
+
+def require_admin_token(func):
+    # Behind a reverse proxy every request looks local, so the client address proves nothing;
+    # only the configured token grants access
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token') or ''
+        if not DATASET_ADMIN_TOKEN or not hmac.compare_digest(token, DATASET_ADMIN_TOKEN):
+            abort(403)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@admin.route('/admin/reload', methods=['POST'])
+@require_admin_token
+def admin_reload():
+    if reload_lock.locked():
+        return {'status': 'running', 'version': current_dataset().version}, 409
+
+    force = request.args.get('force') == '1'
+
+    def run():
+        try:
+            reload_dataset(force=force)
+        except Exception:
+            logger.exception('Dataset reload failed; keeping version %s', current_dataset().version)
+
+    threading.Thread(target=run, name='dataset-reload', daemon=True).start()
+    return {'status': 'started', 'version': current_dataset().version}, 202
+
+
+# Per-callback instrumentation; the hooks apply to every Dash callback request on the server
+instrumentation = Blueprint('instrumentation', __name__)
+
+
+def dash_callback_name():
+    # The callback's output spec, e.g. "stacked-bar-chart.figure", for Dash callback requests
+    if request.method != 'POST' or not request.path.endswith('/_dash-update-component'):
+        return None
+    body = request.get_json(silent=True) or {}
+    return body.get('output')
+
+
+@instrumentation.before_app_request
+def start_callback_metrics():
+    name = dash_callback_name()
+    query_stats.set(None if name is None else {'name': name, 'started': time.perf_counter(), 'scanned': 0, 'returned': 0})
+    if name is not None:
+        profiler.start(name)
+
+
+@instrumentation.after_app_request
+def record_callback_metrics(response):
+    stats = query_stats.get()
+    if stats is None:
+        return response
+    query_stats.set(None)
+    profiler.stop()
+    name = stats['name']
+    metrics.observe('dash_callback_duration_seconds', time.perf_counter() - stats['started'], callback=name)
+    metrics.observe('dash_callback_rows_scanned', stats['scanned'], callback=name)
+    metrics.observe('dash_callback_rows_returned', stats['returned'], callback=name)
+    size = response.content_length
+    if size is None and not response.is_streamed:
+        size = len(response.get_data())
+    metrics.observe('dash_callback_response_bytes', size or 0, callback=name)
+    if response.status_code >= 400:
+        metrics.inc('dash_callback_errors_total', callback=name)
+    return response
+
+
+@instrumentation.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@admin.route('/admin/profiler', methods=['GET', 'POST'])
+@require_admin_token
+def admin_profiler():
+    # GET lists recent slow-callback profiles; POST ?threshold_ms=N turns profiling on (0 turns it off)
+    if request.method == 'POST':
+        profiler.threshold = max(0.0, request.args.get('threshold_ms', 0, type=float) / 1000)
+    return {'threshold_ms': profiler.threshold * 1000, 'profiles': list(profiler.profiles)}
+
+
+api = Blueprint('api', __name__)
+
+# The React client parses /data dates as DD-MM-YYYY
+API_DATE_FORMAT = '%d-%m-%Y'
+API_STREAM_CHUNK_ROWS = 10000
+API_GZIP_MIN_BYTES = 1024
+API_SEARCH_PAGE_ROWS = 20
+API_SEARCH_MAX_ROWS = 500
+API_EXPORT_CHUNK_ROWS = int(os.environ.get('API_EXPORT_CHUNK_ROWS', 100000))
+
+
+def request_values(name):
+    # Multi-valued query parameter, given either repeated (?model=a&model=b) or comma separated
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(value for value in raw.split(',') if value)
+    return values
+
+
+def request_filters():
+    filters = active_filters(
+        brands=request_values('brand'),
+        models=request_values('model'),
+        features=request_values('feature'),
+        facts=request_values('fact'),
+        sources=request_values('source'),
+    )
+    from_date = pd.to_datetime(request.args.get('from'), errors='coerce') if request.args.get('from') else None
+    to_date = pd.to_datetime(request.args.get('to'), errors='coerce') if request.args.get('to') else None
+    if (from_date is not None and pd.isna(from_date)) or (to_date is not None and pd.isna(to_date)):
+        abort(400, 'from/to must be dates (YYYY-MM-DD)')
+    return filters, from_date, to_date
+
+
+def api_columns(ds):
+    # The CSV's own columns plus the stable row id
+    available = SQLITE_COLUMNS if ds.frame is None else ds.frame.columns
+    return ['row_id'] + [column for column in ds.source['columns'] if column in available]
+
+
+def require_rows(ds):
+    # Row-level endpoints read the in-memory rows, which the SQLite backend never loads
+    if ds.frame is None:
+        abort(501, 'Not available with the SQLite query backend')
+
+
+def api_records(rows, date_format=API_DATE_FORMAT):
+    return rows.assign(date=rows['date'].dt.strftime(date_format))
+
+
+# Query parameters that change an API response. Anything else, such as the timestamp the React
+# client appends to every GET to defeat caches, is left out of the ETag
+ETAG_PARAMETERS = ['brand', 'model', 'feature', 'fact', 'source', 'from', 'to', 'offset', 'limit', 'format', 'q']
+
+
+def check_etag(ds):
+    # Responses only change with the dataset version and the query, so both make up the ETag
+    parameters = [(name, sorted(request_values(name))) for name in ETAG_PARAMETERS if name in request.args]
+    query = hashlib.sha1(json.dumps(parameters).encode()).hexdigest()[:16]
+    etag = f'{ds.version}-{request.path}-{query}'
+    if request.if_none_match.contains(etag):
+        return etag, Response(status=304, headers={'ETag': f'"{etag}"'})
+    return etag, None
+
+
+def json_response(body, etag):
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+@api.after_request
+def compress_response(response):
+    # gzip buffered responses; streamed responses compress themselves chunk by chunk
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')
+            or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < API_GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def gzip_stream(chunks):
+    # gzip a stream of byte chunks as they are produced
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for data in chunks:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_ndjson(ds, positions, columns):
+    # Serialize bounded row chunks so a large pull never exists as one JSON string
+    for start in range(0, len(positions), API_STREAM_CHUNK_ROWS):
+        chunk = api_records(ds.frame.take(positions[start:start + API_STREAM_CHUNK_ROWS])[columns])
+        data = chunk.to_json(orient='records', lines=True).encode()
+        if not data.endswith(b'\n'):
+            data += b'\n'
+        yield data
+
+
+def stream_response(chunks, mimetype, compress):
+    response = Response(stream_with_context(gzip_stream(chunks) if compress else chunks), mimetype=mimetype)
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+@api.route('/data')
+@api.route('/data.ndjson')
+def api_data():
+    ds = current_dataset()
+    require_rows(ds)
+    etag, not_modified = check_etag(ds)
+    if not_modified is not None:
+        return not_modified
+
+    filters, from_date, to_date = request_filters()
+    positions = ds.query(filters, from_date, to_date)
+    # Negative values would index from the end of the matches instead of paging
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = request.args.get('limit', type=int)
+    positions = positions[offset:] if limit is None else positions[offset:offset + max(0, limit)]
+    columns = api_columns(ds)
+
+    if request.path.endswith('.ndjson') or request.args.get('format') == 'ndjson':
+        compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+        response = stream_response(stream_ndjson(ds, positions, columns), 'application/x-ndjson', compress)
+        response.set_etag(etag)
+        return response
+
+    body = api_records(ds.frame.take(positions)[columns]).to_json(orient='records')
+    return json_response(body, etag)
+
+
+class ChunkSink(io.RawIOBase):
+    # Write-only file that buffers what a writer produced until the stream drains it
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def export_chunks(ds, positions, columns):
+    # The selected rows in bounded frame chunks, so an export never holds a full filtered copy
+    for start in range(0, len(positions), API_EXPORT_CHUNK_ROWS):
+        yield ds.frame.take(positions[start:start + API_EXPORT_CHUNK_ROWS])[columns]
+
+
+def stream_csv(ds, positions, columns):
+    header = True
+    for chunk in export_chunks(ds, positions, columns):
+        yield chunk.to_csv(index=False, header=header, date_format='%Y-%m-%d').encode()
+        header = False
+    if header:
+        yield (','.join(columns) + '\n').encode()
+
+
+def stream_parquet(ds, positions, columns):
+    # One row group per chunk, sent as soon as it is written; the footer follows the last one
+    sink = ChunkSink()
+    schema = pa.Schema.from_pandas(ds.frame.iloc[:0][columns], preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in export_chunks(ds, positions, columns):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'parquet': (stream_parquet, 'application/vnd.apache.parquet'),
+}
+
+
+@api.route('/export.<fmt>')
+def api_export(fmt):
+    # Stream the rows behind the chart (the /data filters) or a feedback table (?model=X&ranking=words)
+    # as CSV or Parquet. Rows are read chunk by chunk from the dataset version the request started on
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    if fmt == 'parquet' and pq is None:
+        abort(501, 'Parquet export requires pyarrow')
+    ds = current_dataset()
+    require_rows(ds)
+    filters, from_date, to_date = request_filters()
+    positions = ds.query(filters, from_date, to_date)
+
+    ranking = request.args.get('ranking')
+    if ranking is not None:
+        # A feedback table's order: the model's precomputed ranking, restricted to the matching rows
+        if ranking not in FEEDBACK_RANKINGS or len(filters.get('model', [])) != 1:
+            abort(400, 'ranking needs one of words/newest/critical and a single model')
+        ordered = ds.ranked_rows(filters['model'][0], ranking)
+        positions = ordered[np.isin(ordered, positions, assume_unique=True)]
+
+    stream, mimetype = EXPORT_FORMATS[fmt]
+    # Parquet is already compressed
+    compress = fmt == 'csv' and 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = stream_response(stream(ds, positions, api_columns(ds)), mimetype, compress)
+    response.headers['Content-Disposition'] = f'attachment; filename="feedback-{ds.version}.{fmt}"'
+    return response
+
+
+def distinct_values(column):
+    ds = current_dataset()
+    etag, not_modified = check_etag(ds)
+    if not_modified is not None:
+        return not_modified
+    filters, from_date, to_date = request_filters()
+    if ds.frame is None:
+        values = current_backend().count_by([column], filters, from_date, to_date).index
+    elif filters or from_date is not None or to_date is not None:
+        values = ds.select(filters, from_date, to_date, columns=column).dropna().unique()
+    else:
+        # Categoricals already know their distinct values
+        values = ds.frame[column].cat.categories
+    return json_response(json.dumps(sorted(str(value) for value in values)), etag)
+
+
+@api.route('/search')
+def api_search():
+    # Ranked full-text matches for ?q=, combinable with the /data filters and paged by offset/limit
+    ds = current_dataset()
+    require_rows(ds)
+    etag, not_modified = check_etag(ds)
+    if not_modified is not None:
+        return not_modified
+
+    text = request.args.get('q', '').strip()
+    if not text:
+        abort(400, 'q is required')
+    filters, from_date, to_date = request_filters()
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(max(1, request.args.get('limit', API_SEARCH_PAGE_ROWS, type=int)), API_SEARCH_MAX_ROWS)
+    positions, scores, total = ds.search(text, filters, from_date, to_date, limit=offset + limit)
+
+    hits = api_records(ds.frame.take(positions[offset:offset + limit])[api_columns(ds)])
+    hits = hits.assign(score=np.round(scores[offset:offset + limit].astype(np.float64), 4))
+    body = f'{{"query":{json.dumps(text)},"total":{total},"offset":{offset},"limit":{limit},' \
+           f'"hits":{hits.to_json(orient="records")}}}'
+    return json_response(body, etag)
+
+
+@api.route('/categories')
+def api_categories():
+    return distinct_values('segment')
+
+
+@api.route('/sources')
+def api_sources():
+    return distinct_values('source')
+
+
+@api.route('/features')
+def api_features():
+    return distinct_values('Feature')
+
+
+@api.route('/feedback/<model>/<int:row_id>/<date>')
+@api.route('/feedback/details/<model>/<int:row_id>/<date>')
+def api_feedback_details(model, row_id, date):
+    # row_id is the stable id carried by feedback links; the date segment is informational
+    ds = current_dataset()
+    etag, not_modified = check_etag(ds)
+    if not_modified is not None:
+        return not_modified
+    row = current_backend().row(row_id)
+    if row is None or row['model'] != model:
+        abort(404)
+    rows = pd.DataFrame([row]) if ds.frame is None else ds.frame.iloc[[ds.row_positions[row_id]]]
+    record = api_records(rows[api_columns(ds)], '%Y-%m-%d')
+    return json_response(record.to_json(orient='records')[1:-1], etag)
+
 
 # External CSS stylesheets
 external_stylesheets = ['https://codepen.io/chriddyp/pen/bWLwgP.css']
@@ -47,15 +2469,19 @@ feature_dropdown_style = {
 }
 
 # Define layout
-app.layout = html.Div([
-    
-    dcc.Location(id='url', refresh=False),
-    dcc.Store(id='stored-dropdown-values', storage_type='local'),
-    html.Div(id='page-content'),
-])
+def get_app_layout():
+    return html.Div([
+        
+        dcc.Location(id='url', refresh=False),
+        dcc.Store(id='stored-dropdown-values', storage_type='local'),
+        html.Div(id='page-content'),
+    ])
 
-# Define the main page layout
+# Define the main page layout. It only depends on the dataset's catalog, so it is built once per
+# dataset version and reused on every navigation
+@cached_result(lambda: ())
 def get_main_layout():
+    catalog = current_dataset().catalog
     return html.Div([
         html.H1(id='heading', style={'textAlign': 'center', 'fontSize': '45px'}),
         html.Div([
@@ -67,6 +2493,7 @@ def get_main_layout():
                     dcc.Dropdown(
                         id='brand-dropdown',
                         placeholder='Select Brand',
+                        options=catalog['brand_options'],
                         multi=True,
                         style=dropdown_button_style
                     ),
@@ -78,6 +2505,7 @@ def get_main_layout():
                     dcc.Dropdown(
                         id='model-dropdown',
                         placeholder='Select Model',
+                        options=catalog['model_options'],
                         multi=True,
                         style=dropdown_button_style
                     ),
@@ -91,7 +2519,7 @@ def get_main_layout():
                         placeholder='Select Feature',
                         multi=True,
                         style={**feature_dropdown_style, 'maxHeight': '350px'},  # Adjust height as needed
-                        options=[{'label': f'Feature {i}', 'value': f'feature_{i}'} for i in range(1, 21)]  # Example options
+                        options=catalog['feature_options']
                                 ),
                 ], style={'margin-bottom': '10px'}),
 
@@ -101,6 +2529,7 @@ def get_main_layout():
                     dcc.Dropdown(
                         id='fact-dropdown',
                         placeholder='Select Fact',
+                        options=catalog['fact_options'],
                         multi=True,
                         style=dropdown_button_style
                     ),
@@ -129,6 +2558,7 @@ def get_main_layout():
                     dcc.Dropdown(
                         id='source-dropdown',
                         placeholder='Select Source',
+                        options=catalog['source_options'],
                         multi=True,
                         style=dropdown_button_style
                     ),
@@ -163,8 +2593,104 @@ def get_main_layout():
                     id='stacked-bar-chart',
                     style={'height': '445px'}
                 ),
+                dcc.RadioItems(
+                    id='trend-granularity',
+                    options=[
+                        {'label': 'Day', 'value': 'day'},
+                        {'label': 'Week', 'value': 'week'},
+                        {'label': 'Month', 'value': 'month'},
+                    ],
+                    value='month',
+                    inline=True,
+                    style={'marginTop': '20px', 'fontSize': '18px'}
+                ),
+                dcc.Graph(id='trend-chart'),
+                dcc.RadioItems(
+                    id='heatmap-group',
+                    options=[
+                        {'label': 'All Features', 'value': 'none'},
+                        {'label': 'Per Brand', 'value': 'brand'},
+                        {'label': 'Per Model', 'value': 'model'},
+                    ],
+                    value='none',
+                    inline=True,
+                    style={'marginTop': '20px', 'fontSize': '18px'}
+                ),
+                dcc.Graph(id='feature-heatmap'),
                 html.Div(id='selected-model-name', style={'textAlign': 'left', 'marginTop': '20px', 'fontSize': '20px', 'fontWeight': 'bold'}),
-                html.Div(id='selected-model-features-table')
+                html.Div(
+                    dash_table.DataTable(
+                        id='model-features-table',
+                        columns=[
+                            {'name': 'Model', 'id': 'model'},
+                            {'name': 'Positive Features', 'id': 'positive', 'presentation': 'markdown'},
+                            {'name': 'Negative Features', 'id': 'negative', 'presentation': 'markdown'},
+                        ],
+                        data=[],
+                        page_action='custom',
+                        page_current=0,
+                        page_size=MODEL_FEATURES_PAGE_SIZE,
+                        page_count=1,
+                        style_table={'overflowX': 'auto', 'width': '100%'},
+                        style_cell={
+                            'textAlign': 'left',
+                            'padding': '10px',
+                            'whiteSpace': 'normal',
+                            'height': 'auto',
+                            'fontSize': '20px'
+                        },
+                        style_header={
+                            'backgroundColor': 'rgb(230, 230, 230)',
+                            'fontWeight': 'bold',
+                            'fontSize': '20px'
+                        },
+                        style_data_conditional=[
+                            {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 248)'}
+                        ],
+                    ),
+                    id='selected-model-features-table',
+                    style={'marginTop': '10px'}
+                ),
+
+                # Full-text search over feedback and summaries, narrowed by the filters on the left
+                html.Div([
+                    dcc.Input(
+                        id='search-input',
+                        type='search',
+                        placeholder='Search feedback...',
+                        debounce=True,
+                        style={'width': '400px', 'fontSize': '20px', 'padding': '5px'}
+                    ),
+                    html.Span(id='search-summary', style={'marginLeft': '15px', 'fontSize': '18px'}),
+                    dash_table.DataTable(
+                        id='search-results',
+                        columns=[
+                            {'name': 'Date', 'id': 'date'},
+                            {'name': 'Brand', 'id': 'brand'},
+                            {'name': 'Model', 'id': 'model'},
+                            {'name': 'Summary', 'id': 'Summary'},
+                            {'name': 'Feedback', 'id': 'feedback', 'presentation': 'markdown'},
+                        ],
+                        data=[],
+                        page_action='custom',
+                        page_current=0,
+                        page_size=SEARCH_PAGE_SIZE,
+                        page_count=1,
+                        style_table={'overflowX': 'auto', 'width': '100%', 'marginTop': '10px'},
+                        style_cell={
+                            'textAlign': 'left',
+                            'padding': '10px',
+                            'whiteSpace': 'normal',
+                            'height': 'auto',
+                            'fontSize': '18px'
+                        },
+                        style_header={
+                            'backgroundColor': 'rgb(230, 230, 230)',
+                            'fontWeight': 'bold',
+                            'fontSize': '20px'
+                        },
+                    ),
+                ], style={'marginTop': '30px'})
             ], style={
                 'display': 'inline-block',
                 'width': 'calc(100% - 260px)',
@@ -172,7 +2698,27 @@ def get_main_layout():
             })
         ]),
     ], style={'fontFamily': 'Arial, sans-serif'})
-@app.callback(
+
+
+# Start of the callback definitions, for the startup timing breakdown
+CALLBACKS_STARTED = time.perf_counter()
+
+# Save dropdown selections to dcc.Store in the browser, without a server round trip
+clientside_callback(
+    """
+    function(brand, model, feature, fact, category, source, fromDate, toDate) {
+        return {
+            brand: brand,
+            model: model,
+            feature: feature,
+            fact: fact,
+            category: category,
+            source: source,
+            from_date: fromDate,
+            to_date: toDate
+        };
+    }
+    """,
     Output('stored-dropdown-values', 'data'),
     [Input('brand-dropdown', 'value'),
      Input('model-dropdown', 'value'),
@@ -183,20 +2729,22 @@ def get_main_layout():
      Input('from-date-picker', 'date'),
      Input('to-date-picker', 'date')]
 )
-def save_dropdown_values(brand, model, feature, fact, category, source, from_date, to_date):
-    return {
-        'brand': brand,
-        'model': model,
-        'feature': feature,
-        'fact': fact,
-        'category': category,
-        'source': source,
-        'from_date': from_date,
-        'to_date': to_date
-    }
 
-# Load dropdown selections from dcc.Store when navigating back to the page
-@app.callback(
+# Load dropdown selections from dcc.Store once, when the main page is rendered. The store is only
+# read as State, so saving a selection no longer writes the same values back into the dropdowns
+clientside_callback(
+    """
+    function(pathname, stored) {
+        var noUpdate = window.dash_clientside.no_update;
+        var keys = ['brand', 'model', 'feature', 'fact', 'category', 'source', 'from_date', 'to_date'];
+        if (!stored || (pathname && pathname.indexOf('/feedback') === 0)) {
+            return keys.map(function() { return noUpdate; });
+        }
+        return keys.map(function(key) {
+            return stored[key] === undefined ? null : stored[key];
+        });
+    }
+    """,
     [Output('brand-dropdown', 'value'),
      Output('model-dropdown', 'value'),
      Output('feature-dropdown', 'value'),
@@ -205,109 +2753,127 @@ def save_dropdown_values(brand, model, feature, fact, category, source, from_dat
      Output('source-dropdown', 'value'),
      Output('from-date-picker', 'date'),
      Output('to-date-picker', 'date')],
-    [Input('stored-dropdown-values', 'data')]
+    [Input('url', 'pathname')],
+    [State('stored-dropdown-values', 'data')]
 )
-def load_dropdown_values(stored_values):
-    if stored_values is None:
-        return [None] * 8
-    return (
-        stored_values.get('brand'),
-        stored_values.get('model'),
-        stored_values.get('feature'),
-        stored_values.get('fact'),
-        stored_values.get('category'),
-        stored_values.get('source'),
-        stored_values.get('from_date'),
-        stored_values.get('to_date')
-    )
-# Update table with selected model's features, showing 3 positive and 3 negative features per model
-# Update table with selected model's features, showing 3 positive and 3 negative features per model
-@app.callback(
-    [Output('selected-model-features-table', 'children'),
+
+# Update table with selected model's features, showing 3 positive and 3 negative features per model.
+# The table pages over models on the server, so a response never carries more than one page of them
+MODEL_FEATURES_PAGE_SIZE = 10
+
+
+def model_features_records(ds, models):
+    # One row per model, linking each top feature to the model's feedback page
+    records = []
+    for model in models:
+        positive, negative = ds.top_features.get(model, ([], []))
+        records.append({
+            'model': model,
+            'positive': ', '.join(f'[{feature}](/feedback/{model}/{feature}/Positive)' for feature in positive),
+            'negative': ', '.join(f'[{feature}](/feedback/{model}/{feature}/Negative)' for feature in negative),
+        })
+    return records
+
+
+def selected_models_text(selected_models):
+    if not selected_models or 'All' in selected_models:
+        return f"Selected Model(s): All ({len(current_dataset().top_features)} models)"
+    return f"Selected Model(s): {', '.join(selected_models)}"
+
+
+def preview_selected_model_features_table(selected_models, page_current):
+    # Shown while the table page is being built
+    return [], 1, selected_models_text(selected_models)
+
+
+@heavy_callback(
+    [Output('model-features-table', 'data'),
+     Output('model-features-table', 'page_count'),
      Output('selected-model-name', 'children')],
-    [Input('model-dropdown', 'value')]
+    [Input('model-dropdown', 'value'),
+     Input('model-features-table', 'page_current')],
+    preview=preview_selected_model_features_table,
 )
-def update_selected_model_features_table(selected_models):
-    # If no model is selected or "All" is selected, use all unique models in the dataframe
+@cached_result(lambda selected_models, page_current: (normalize_selection(selected_models), page_current or 0))
+def update_selected_model_features_table(selected_models, page_current):
+    # If no model is selected or "All" is selected, page through every model in the dataset
+    ds = current_dataset()
     if not selected_models or 'All' in selected_models:
-        selected_models = df['model'].unique()
-
-    # Display the selected model(s)
-    selected_model_text = f"Selected Model(s): {', '.join(selected_models)}"
-
-    # Create a list to hold tables for each model
-    model_tables = []
-
-    # Iterate through each selected model
-    for selected_model in selected_models:
-        # Filter dataframe based on the selected model
-        filtered_df = df[df['model'] == selected_model]
-
-        # Extract positive and negative features
-        positive_features = filtered_df[filtered_df['CriticalRanking'] >= 0].head(3)
-        negative_features = filtered_df[filtered_df['CriticalRanking'] <= 0].head(3)
-
-        # Create table rows for positive and negative features
-        positive_rows = [html.Tr([html.Td(
-                        dcc.Link("+", href=f'/feedback/{row["model"]}/{row["Feature"]}/Positive', style={'color': 'green', 'fontWeight': 'bold'})
-                    ), html.Td(row['Feature'])]) for _, row in positive_features.iterrows()]
-        negative_rows = [html.Tr([html.Td(
-                        dcc.Link("-", href=f'/feedback/{row["model"]}/{row["Feature"]}/Negative', style={'color': 'red', 'fontWeight': 'bold'})
-                    ), html.Td(row['Feature'])]) for _, row in negative_features.iterrows()]
-
-        # Add the table for the current model
-        model_tables.append(
-    html.Div([
-        html.H3(f"Model: {selected_model}"),
-        html.Table([
-            html.Thead(html.Tr([
-                html.Th("Positive Features", style={'fontSize': '20px'}),  # Increase font size for table headers
-                html.Th("Negative Features", style={'fontSize': '20px'})   # Increase font size for table headers
-            ])),
-            html.Tbody([
-                html.Tr([
-                    html.Td(
-                        html.Table(positive_rows),
-                        style={
-                            'width': '50%',
-                            'border': '1px solid black',
-                            'verticalAlign': 'top',
-                            'padding': '10px',
-                            'fontSize': '20px'  # Increase font size for table content
-                        }
-                    ),
-                    html.Td(
-                        html.Table(negative_rows),
-                        style={
-                            'width': '50%',
-                            'border': '1px solid black',
-                            'verticalAlign': 'top',
-                            'padding': '10px',
-                            'fontSize': '20px'  # Increase font size for table content
-                        }
-                    )
-                ])
-            ])
-        ], style={'width': '100%', 'borderCollapse': 'collapse', 'marginBottom': '30px'})
-    ])
-)
+        models = list(ds.top_features)
+    else:
+        models = selected_models
+
+    page_count = max(1, -(-len(models) // MODEL_FEATURES_PAGE_SIZE))
+    # The page may be past the end after the selection shrinks
+    page = min(page_current or 0, page_count - 1)
+    start = page * MODEL_FEATURES_PAGE_SIZE
+    page_models = models[start:start + MODEL_FEATURES_PAGE_SIZE]
+    count_rows(len(page_models), len(page_models))
+    return model_features_records(ds, page_models), page_count, selected_models_text(selected_models)
 
 
-    # Return the list of tables for all selected models
-    return html.Div(model_tables), selected_model_text
+# Page through full-text search results; an empty search shows nothing
+SEARCH_PAGE_SIZE = 10
 
-def get_feedback_layout(selected_model):  
-    # Extract relevant information from the DataFrame, filter by model
-    feedback = df[df['model'] == selected_model]
 
-    # Calculate word count for each feedback
-    feedback['word_count'] = feedback['feedback'].apply(lambda x: len(str(x).split()))
+@callback(
+    [Output('search-results', 'data'),
+     Output('search-results', 'page_count'),
+     Output('search-summary', 'children')],
+    [Input('search-input', 'value'),
+     Input('search-results', 'page_current'),
+     Input('brand-dropdown', 'value'),
+     Input('model-dropdown', 'value'),
+     Input('feature-dropdown', 'value'),
+     Input('fact-dropdown', 'value'),
+     Input('source-dropdown', 'value'),
+     Input('from-date-picker', 'date'),
+     Input('to-date-picker', 'date')]
+)
+@cached_result(lambda text, page_current, brands, models, features, facts, sources, from_date, to_date: (
+    (text or '').strip().lower(), page_current or 0, normalize_selection(brands), normalize_selection(models),
+    normalize_selection(features), normalize_selection(facts), normalize_selection(sources),
+    normalize_date(from_date), normalize_date(to_date),
+))
+def update_search_results(text, page_current, selected_brands, selected_models, selected_features, selected_facts, selected_sources, from_date, to_date):
+    if not text or not text.strip():
+        return [], 1, ''
+    ds = current_dataset()
+    if ds.frame is None:
+        # The search index is built from the in-memory rows
+        return [], 1, 'Search is not available with the SQLite query backend'
+    from_date = pd.to_datetime(from_date, format='%Y-%m-%d', errors='coerce') if from_date else None
+    to_date = pd.to_datetime(to_date, format='%Y-%m-%d', errors='coerce') if to_date else None
+    filters = active_filters(selected_brands, selected_models, selected_features, selected_facts, selected_sources)
+
+    positions, _, total = ds.search(text, filters,
+                                    None if from_date is None or pd.isna(from_date) else from_date,
+                                    None if to_date is None or pd.isna(to_date) else to_date,
+                                    limit=((page_current or 0) + 1) * SEARCH_PAGE_SIZE)
+    page_count = max(1, -(-total // SEARCH_PAGE_SIZE))
+    page = min(page_current or 0, page_count - 1)
+    rows = ds.frame.take(positions[page * SEARCH_PAGE_SIZE:(page + 1) * SEARCH_PAGE_SIZE])
+    return feedback_table_records(rows), page_count, f'{total:,} matching feedback'
+
+
+# Serve the feedback table page by page from the dataset ('server'), or ship the top 50 rows to the
+# browser and page there ('client')
+FEEDBACK_TABLE_MODE = os.environ.get('FEEDBACK_TABLE_MODE', 'server')
+FEEDBACK_CLIENT_ROWS = 50
+
+
+def feedback_table_records(rows):
+    # Serialize only the displayed columns, replacing the feedback text with a link to its detail page
+    dates = rows['date'].dt.strftime('%Y-%m-%d').fillna('')
+    links = [
+        f"[Orginal Feedback](/feedback/details/{model}/{row_id}/{date})"
+        for model, row_id, date in zip(rows['model'], rows['row_id'], dates)
+    ]
+    return rows[['brand', 'model', 'segment', 'Summary']].assign(date=dates, feedback=links).to_dict('records')
 
-    # Sort feedback by word count in descending order and get the top 50 rows
-    sorted_feedback = feedback.sort_values(by='word_count', ascending=False).head(50)
 
-    # Convert the sorted feedback to a list of records
-    feedback_list = sorted_feedback.to_dict('records')
+def get_feedback_layout(selected_model, ranking='words', mode=None):  
+    mode = mode or FEEDBACK_TABLE_MODE
 
     # Add a button to redirect to detailed feedback
     columns = [
@@ -322,24 +2888,28 @@ def get_feedback_layout(selected_model):
         }
     ]
 
-    # Create the feedback table with links for each feedback item
-    data_with_links = []
-    def format_date(date):
-        return pd.to_datetime(date).strftime('%Y-%m-%d')  # Ensure date is in YYYY-MM-DD format
-
-# In your feedback loop:
-    for i, row in enumerate(feedback_list):
-        row_copy = row.copy()
-        formatted_date = format_date(row['date'])  # Use formatted date
-        feedback_link = f"[Orginal Feedback](/feedback/details/{row['model']}/{i}/{formatted_date})"
-        row_copy['feedback'] = feedback_link
-        data_with_links.append(row_copy)
+    if mode == 'server':
+        # Pages are fetched by update_feedback_table over the model's whole history
+        table_options = {
+            'data': [],
+            'page_action': 'custom',
+            'page_current': 0,
+            'sort_action': 'custom',
+            'sort_mode': 'single',
+            'sort_by': [],
+            'filter_action': 'custom',
+            'filter_query': '',
+        }
+    else:
+        # Take the model's top rows in ranking order (longest feedback first by default)
+        top_rows, _ = current_backend().feedback_page(selected_model, ranking, limit=FEEDBACK_CLIENT_ROWS)
+        table_options = {'data': feedback_table_records(top_rows)}
     
     return html.Div([
+        dcc.Store(id='feedback-table-model', data={'model': selected_model, 'ranking': ranking}),
         dash_table.DataTable(
             id='feedback-table',
             columns=columns,
-            data=data_with_links,
             page_size=10,  # Show 10 rows per page
             style_table={'overflowX': 'auto', 'width': '100%'},  # Expand the table width
             style_cell={
@@ -357,13 +2927,117 @@ def get_feedback_layout(selected_model):
             style_data_conditional=[
                 {'if': {'row_index': 'odd'}, 'backgroundColor': 'rgb(248, 248, 248)'}
             ],
-            row_deletable=False
+            row_deletable=False,
+            **table_options
         )
     ])
 
 
+# Operators of the DataTable filter query syntax, by symbol and by name
+FILTER_OPERATORS = {
+    '>=': 'ge', '<=': 'le', '<': 'lt', '>': 'gt', '!=': 'ne', '=': 'eq',
+    'ge': 'ge', 'le': 'le', 'lt': 'lt', 'gt': 'gt', 'ne': 'ne', 'eq': 'eq',
+    'contains': 'contains', 'datestartswith': 'datestartswith',
+}
+# "{column} op value", where a relational operator may carry the table's s/i case prefix
+# (e.g. scontains); the operator is matched only right after the column, never inside the value
+FILTER_CLAUSE = re.compile(
+    r'^\s*\{([^}]+)\}\s+[si]?(>=|<=|!=|<|>|=|ge|le|lt|gt|ne|eq|contains|datestartswith)\s+(.*?)\s*$', re.DOTALL
+)
+
+
+def split_filter_part(filter_part):
+    # Parse one "{column} op value" clause of a DataTable filter_query
+    match = FILTER_CLAUSE.match(filter_part)
+    if match is None:
+        return None, None, None
+    name, operator, value = match.groups()
+    quote = value[:1]
+    if len(value) >= 2 and quote == value[-1] and quote in ('"', "'", '`'):
+        value = value[1:-1].replace('\\' + quote, quote)
+    return name, FILTER_OPERATORS[operator], value
+
+
+# Columns of the feedback table that can be filtered on
+FILTERABLE_COLUMNS = ['brand', 'model', 'date', 'segment', 'Summary', 'feedback']
+
+
+def parse_filter_query(filter_query):
+    # (column, operator, value) clauses of a DataTable filter_query, keeping only filterable columns
+    clauses = []
+    for filter_part in (filter_query or '').split(' && '):
+        name, operator, value = split_filter_part(filter_part)
+        if name in FILTERABLE_COLUMNS and value:
+            clauses.append((name, operator, value))
+    return clauses
+
+
+def filter_feedback_rows(rows, clauses):
+    # Apply parsed filter clauses to a frame slice
+    for name, operator, value in clauses:
+        column = rows[name]
+        if name == 'date':
+            if operator == 'datestartswith':
+                mask = column.dt.strftime('%Y-%m-%d').str.startswith(value)
+            else:
+                value = pd.to_datetime(value, errors='coerce')
+                if pd.isna(value):
+                    continue
+                mask = {'ge': column >= value, 'le': column <= value, 'lt': column < value,
+                        'gt': column > value, 'ne': column != value, 'eq': column == value}[operator]
+        else:
+            text = column.astype(str)
+            if operator in ('contains', 'datestartswith'):
+                mask = text.str.contains(value, case=False, regex=False)
+            elif operator in ('eq', 'ne'):
+                mask = (text == value) if operator == 'eq' else (text != value)
+            else:
+                mask = {'ge': text >= value, 'le': text <= value,
+                        'lt': text < value, 'gt': text > value}[operator]
+        rows = rows[mask.fillna(False).to_numpy(dtype=bool)]
+    return rows
+
+
+# Sorting on these columns reads a precomputed ranking instead of sorting the slice
+SORT_RANKINGS = {'date': 'newest', 'feedback': 'words'}
 
-@app.callback(
+
+@callback(
+    [Output('feedback-table', 'data'),
+     Output('feedback-table', 'page_count')],
+    [Input('feedback-table', 'page_current'),
+     Input('feedback-table', 'page_size'),
+     Input('feedback-table', 'sort_by'),
+     Input('feedback-table', 'filter_query')],
+    [State('feedback-table-model', 'data'),
+     State('feedback-table', 'page_action')]
+)
+def update_feedback_table(page_current, page_size, sort_by, filter_query, table_model, page_action):
+    if page_action != 'custom' or not table_model:
+        return dash.no_update, dash.no_update
+
+    page_current = page_current or 0
+    page_size = page_size or 10
+    model = table_model['model']
+    ranking = table_model.get('ranking') or 'words'
+
+    # Pick an ordering over the model's rows; date and feedback sorts reuse precomputed rankings
+    sort = sort_by[0] if sort_by else None
+    descending = sort is None or sort['direction'] == 'desc'
+    sort_column = None
+    if sort is not None and sort['column_id'] in SORT_RANKINGS:
+        ranking = SORT_RANKINGS[sort['column_id']]
+    elif sort is not None:
+        sort_column = sort['column_id']
+
+    page, total = current_backend().feedback_page(
+        model, ranking, descending, sort_column, parse_filter_query(filter_query),
+        offset=page_current * page_size, limit=page_size,
+    )
+    return feedback_table_records(page), -(-total // page_size)
+
+
+@callback(
     Output('feedback-output', 'children'),
     [Input('feedback-table', 'data')],
     [State('feedback-table', 'selected_rows')]
@@ -376,72 +3050,93 @@ def display_feedback(rows, selected_rows):
         html.H5("Feedback Details"),
         html.P(selected_feedback)
     ])
-# Callback to update brand dropdown with all available brands
-@app.callback(
-    Output('brand-dropdown', 'options'),
-    [Input('brand-dropdown', 'value')]
-)
-def update_brand_dropdown(_):
-    brands = df['brand'].unique()
-    options = [{'label': brand, 'value': brand} for brand in brands]
-    options.insert(0, {'label': 'All', 'value': 'All'})
-    return options
+# Brand, fact and source options are embedded in the main layout from the dataset's catalog
 
 # Update model dropdown based on selected brand
-@app.callback(
+@callback(
     Output('model-dropdown', 'options'),
-    [Input('brand-dropdown', 'value')]
+    [Input('brand-dropdown', 'value')],
+    # The layout already renders the catalog's options, so skip the redundant call on page load
+    prevent_initial_call=True
 )
 def update_model_dropdown(selected_brands):
     if not selected_brands or 'All' in selected_brands:
-        models = df['model'].unique()
-    else:
-        models = df[df['brand'].isin(selected_brands)]['model'].unique()
-        
-    options = [{'label': model, 'value': model} for model in models]
-    options.insert(0, {'label': 'All', 'value': 'All'})
-    return options
+        return current_dataset().catalog['model_options']
+    counts = current_backend().count_by(['model'], {'brand': selected_brands})
+    return dropdown_options(counts.to_dict())
 
 # Update feature dropdown based on selected model
-@app.callback(
+@callback(
     Output('feature-dropdown', 'options'),
-    [Input('model-dropdown', 'value')]
+    [Input('model-dropdown', 'value')],
+    # The layout already renders the catalog's options, so skip the redundant call on page load
+    prevent_initial_call=True
 )
 def update_feature_dropdown(selected_models):
     if not selected_models or 'All' in selected_models:
-        features = df['Feature'].unique()
-    else:
-        filtered_df = df[df['model'].isin(selected_models)]
-        features = filtered_df['Feature'].unique()
-        
-    options = [{'label': feature, 'value': feature} for feature in features]
-    options.insert(0, {'label': 'All', 'value': 'All'})
-    return options
+        return current_dataset().catalog['feature_options']
+    counts = current_backend().count_by(['Feature'], {'model': selected_models})
+    return dropdown_options(counts.to_dict())
 
-# Update fact dropdown based on selected feature
-@app.callback(
-    Output('fact-dropdown', 'options'),
-    [Input('feature-dropdown', 'value')]
-)
-def update_fact_dropdown(selected_features):
-    fact_options = ['Very Positive', 'Positive', 'Neutral', 'Negative', 'Very Negative']
-    options = [{'label': fact, 'value': fact} for fact in fact_options]
-    options.insert(0, {'label': 'All', 'value': 'All'})
-    return options
+# Update stacked bar chart based on selected brand, model, feature, fact, category, and source
+# Define colors for the stacked bars
+FACT_COLORS = {
+    'Very Positive': '#234f1e',
+    'Positive': '#299617',
+    'Neutral': '#545454',
+    'Negative': '#d21401',
+    'Very Negative': '#8b0000'
+}
 
-# Update source dropdown with all unique sources
-@app.callback(
-    Output('source-dropdown', 'options'),
-    [Input('source-dropdown', 'value')]
-)
-def update_source_dropdown(_):
-    sources = df['source'].unique()  # Assuming there is a 'source' column in the dataframe
-    options = [{'label': source, 'value': source} for source in sources]
-    options.insert(0, {'label': 'All', 'value': 'All'})
-    return options
 
-# Update stacked bar chart based on selected brand, model, feature, fact, category, and source
-@app.callback(
+def sentiment_figure(model_fact_counts, title='Sentiment Analysis by Model'):
+    # Stacked bars of the fact counts per model
+    fact_categories = FACT_CATEGORIES
+    fact_colors = FACT_COLORS
+
+    # Create traces for each fact category
+    traces = []
+    for fact in fact_categories:
+        if fact in model_fact_counts.columns:
+            traces.append(go.Bar(
+                x=list(model_fact_counts.index),
+                y=model_fact_counts[fact],
+                name=fact,
+                marker_color=fact_colors[fact]
+            ))
+
+    # Create the stacked bar chart figure
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        barmode='stack',
+        xaxis=dict(title='Model'),
+        yaxis=dict(title='Count'),
+        title=title,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        bargap=0.1,  # Decrease gap between bars to make them wider
+        bargroupgap=0.1,  # Adjust space between groups of bars
+        height=525,  # Increase the height of the chart
+        width=1300   # Increase the width of the chart
+    )
+
+    return fig
+
+
+def preview_stacked_bar_chart(selected_brands, selected_models, selected_features, selected_facts, selected_categories, selected_sources, from_date, to_date):
+    # Estimate from the row sample, shown while the exact chart is computed
+    from_date = pd.to_datetime(from_date, format='%Y-%m-%d', errors='coerce') if from_date else pd.NaT
+    to_date = pd.to_datetime(to_date, format='%Y-%m-%d', errors='coerce') if to_date else pd.NaT
+    # The row sample is kept with the in-memory rows only
+    if pd.isna(from_date) or pd.isna(to_date) or current_dataset().frame is None:
+        return go.Figure()
+
+    filters = active_filters(selected_brands, selected_models, selected_features, selected_facts, selected_sources)
+    counts = current_dataset().approximate_counts(['model', 'fact'], filters, from_date, to_date)
+    return sentiment_figure(counts.unstack(fill_value=0), title='Sentiment Analysis by Model (estimate)')
+
+
+@heavy_callback(
     Output('stacked-bar-chart', 'figure'),
     [Input('brand-dropdown', 'value'),
      Input('model-dropdown', 'value'),
@@ -450,125 +3145,209 @@ def update_source_dropdown(_):
      Input('category-dropdown', 'value'),
      Input('source-dropdown', 'value'),
      Input('from-date-picker', 'date'),
-     Input('to-date-picker', 'date')]
+     Input('to-date-picker', 'date')],
+    preview=preview_stacked_bar_chart,
 )
+@cached_result(lambda brands, models, features, facts, categories, sources, from_date, to_date: (
+    normalize_selection(brands), normalize_selection(models), normalize_selection(features),
+    normalize_selection(facts), normalize_selection(sources), normalize_date(from_date), normalize_date(to_date),
+))
 def update_stacked_bar_chart(selected_brands, selected_models, selected_features, selected_facts, selected_categories, selected_sources, from_date, to_date):
     if not from_date or not to_date:
         # Return an empty figure if dates are not provided
         return go.Figure()
 
-    filtered_df = df.copy()
-
-    if selected_brands and 'All' not in selected_brands:
-        filtered_df = filtered_df[filtered_df['brand'].isin(selected_brands)]
-    
-    if selected_models and 'All' not in selected_models:
-        filtered_df = filtered_df[filtered_df['model'].isin(selected_models)]
-    
-    if selected_features and 'All' not in selected_features:
-        filtered_df = filtered_df[filtered_df['Feature'].isin(selected_features)]
-    
-    if selected_facts and 'All' not in selected_facts:
-        filtered_df = filtered_df[filtered_df['fact'].isin(selected_facts)]
-    
-    if selected_sources and 'All' not in selected_sources:
-        filtered_df = filtered_df[filtered_df['source'].isin(selected_sources)]
-
-    # Convert the 'date' column to datetime format
-    filtered_df.loc[:, 'date'] = pd.to_datetime(filtered_df['date'], errors='coerce')
-    
-
-
     # Ensure from_date and to_date are in datetime format
     from_date = pd.to_datetime(from_date, format='%Y-%m-%d', errors='coerce')
     to_date = pd.to_datetime(to_date, format='%Y-%m-%d', errors='coerce')
 
-    # Filter based on date range
-    filtered_df = filtered_df[(filtered_df['date'] >= from_date) & (filtered_df['date'] <= to_date)]
+    if pd.isna(from_date) or pd.isna(to_date):
+        return go.Figure()
 
-    # Group data by model and fact, then count occurrences
-    model_fact_counts = filtered_df.groupby(['model', 'fact']).size().unstack(fill_value=0)
+    # Count the matching rows by model and fact
+    filters = active_filters(selected_brands, selected_models, selected_features, selected_facts, selected_sources)
+    counts = current_backend().count_by(['model', 'fact'], filters, from_date, to_date)
+    return sentiment_figure(counts.unstack(fill_value=0))
 
-    # Define the fact categories
-    fact_categories = ['Very Positive', 'Positive', 'Neutral', 'Negative', 'Very Negative']
 
-    # Define colors for the stacked bars
-    fact_colors = {
-        'Very Positive': '#234f1e',
-        'Positive': '#299617',  
-        'Neutral': '#545454',    
-        'Negative': '#d21401',
-        'Very Negative': '#8b0000'
-    }
+# Update the sentiment trend chart: fact counts per day, week or month for the selected filters
+@callback(
+    Output('trend-chart', 'figure'),
+    [Input('trend-granularity', 'value'),
+     Input('brand-dropdown', 'value'),
+     Input('model-dropdown', 'value'),
+     Input('feature-dropdown', 'value'),
+     Input('fact-dropdown', 'value'),
+     Input('source-dropdown', 'value'),
+     Input('from-date-picker', 'date'),
+     Input('to-date-picker', 'date')]
+)
+@cached_result(lambda granularity, brands, models, features, facts, sources, from_date, to_date: (
+    granularity, normalize_selection(brands), normalize_selection(models), normalize_selection(features),
+    normalize_selection(facts), normalize_selection(sources), normalize_date(from_date), normalize_date(to_date),
+))
+def update_trend_chart(granularity, selected_brands, selected_models, selected_features, selected_facts, selected_sources, from_date, to_date):
+    from_date = pd.to_datetime(from_date, format='%Y-%m-%d', errors='coerce') if from_date else pd.NaT
+    to_date = pd.to_datetime(to_date, format='%Y-%m-%d', errors='coerce') if to_date else pd.NaT
+    if pd.isna(from_date) or pd.isna(to_date) or granularity not in ROLLUP_PERIODS:
+        return go.Figure()
+
+    filters = active_filters(selected_brands, selected_models, selected_features, selected_facts, selected_sources)
+    bucket_fact_counts = current_backend().trend_counts(granularity, filters, from_date, to_date).unstack(fill_value=0)
 
-    # Create traces for each fact category
     traces = []
-    for fact in fact_categories:
-        if fact in model_fact_counts.columns:
+    for fact in FACT_CATEGORIES:
+        if fact in bucket_fact_counts.columns:
             traces.append(go.Bar(
-                x=model_fact_counts.index,
-                y=model_fact_counts[fact],
+                x=list(bucket_fact_counts.index),
+                y=bucket_fact_counts[fact],
                 name=fact,
-                marker_color=fact_colors[fact]
+                marker_color=FACT_COLORS[fact]
             ))
 
-    # Create the stacked bar chart figure
     fig = go.Figure(data=traces)
     fig.update_layout(
         barmode='stack',
-        xaxis=dict(title='Model'),
+        xaxis=dict(title=granularity.capitalize()),
         yaxis=dict(title='Count'),
-        title='Sentiment Analysis by Model',
+        title=f'Sentiment Trend by {granularity.capitalize()}',
         plot_bgcolor='rgba(0,0,0,0)',
         paper_bgcolor='rgba(0,0,0,0)',
-        bargap=0.1,  # Decrease gap between bars to make them wider
-        bargroupgap=0.1,  # Adjust space between groups of bars
-        height=525,  # Increase the height of the chart
-        width=1300   # Increase the width of the chart
+        bargap=0.1,
+        height=400,
+        width=1300
     )
+    return fig
+
+
+# Update the feature x sentiment heatmap: cells are coloured by their share of the feature's net
+# sentiment, rows are features (per brand or model when grouped) sorted by net sentiment
+HEATMAP_GROUPS = {'none': None, 'brand': 'brand', 'model': 'model'}
+# Rows beyond this many are dropped, keeping the ones with the most feedback
+HEATMAP_MAX_ROWS = int(os.environ.get('HEATMAP_MAX_ROWS', 5000))
 
+
+@callback(
+    Output('feature-heatmap', 'figure'),
+    [Input('heatmap-group', 'value'),
+     Input('brand-dropdown', 'value'),
+     Input('model-dropdown', 'value'),
+     Input('feature-dropdown', 'value'),
+     Input('fact-dropdown', 'value'),
+     Input('source-dropdown', 'value'),
+     Input('from-date-picker', 'date'),
+     Input('to-date-picker', 'date')]
+)
+@cached_result(lambda group, brands, models, features, facts, sources, from_date, to_date: (
+    group, normalize_selection(brands), normalize_selection(models), normalize_selection(features),
+    normalize_selection(facts), normalize_selection(sources), normalize_date(from_date), normalize_date(to_date),
+))
+def update_feature_heatmap(group, selected_brands, selected_models, selected_features, selected_facts, selected_sources, from_date, to_date):
+    from_date = pd.to_datetime(from_date, format='%Y-%m-%d', errors='coerce') if from_date else None
+    to_date = pd.to_datetime(to_date, format='%Y-%m-%d', errors='coerce') if to_date else None
+    if group not in HEATMAP_GROUPS or (from_date is not None and pd.isna(from_date)) or (to_date is not None and pd.isna(to_date)):
+        return go.Figure()
+
+    counts, net = current_backend().sentiment_crosstab(
+        HEATMAP_GROUPS[group],
+        active_filters(selected_brands, selected_models, selected_features, selected_facts, selected_sources),
+        from_date, to_date,
+    )
+    if counts.empty:
+        return go.Figure()
+
+    title = 'Net Sentiment by Feature'
+    totals = counts.sum(axis=1).to_numpy()
+    if len(totals) > HEATMAP_MAX_ROWS:
+        title += f' (top {HEATMAP_MAX_ROWS:,} of {len(totals):,} by feedback count)'
+        keep = np.sort(np.argpartition(-totals, HEATMAP_MAX_ROWS - 1)[:HEATMAP_MAX_ROWS])
+        counts, net, totals = counts.iloc[keep], net.iloc[keep], totals[keep]
+
+    # Most positive features on top
+    scores = net.sum(axis=1).to_numpy()
+    order = np.argsort(scores, kind='stable')
+    counts, net, scores, totals = counts.iloc[order], net.iloc[order], scores[order], totals[order]
+    labels = [' / '.join(map(str, key)) if isinstance(key, tuple) else str(key) for key in counts.index]
+
+    fig = go.Figure(go.Heatmap(
+        z=net.to_numpy(),
+        x=list(counts.columns),
+        y=[f'{label} ({score:+.2f})' for label, score in zip(labels, scores)],
+        customdata=np.dstack([counts.to_numpy(), counts.to_numpy() / totals[:, None]]),
+        hovertemplate='%{y}<br>%{x}: %{customdata[0]:,} rows (%{customdata[1]:.0%})<br>'
+                      'Net sentiment contribution: %{z:+.2f}<extra></extra>',
+        colorscale='RdYlGn',
+        zmid=0,
+        colorbar=dict(title='Net'),
+    ))
+    fig.update_layout(
+        xaxis=dict(title='Sentiment', side='top'),
+        yaxis=dict(title='Feature (net sentiment)', automargin=True),
+        title=title,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=max(400, 120 + 18 * len(labels)),
+        width=1300
+    )
     return fig
 
 
-# Update heading based on selected feature and fact
-@app.callback(
+# Update heading based on selected feature and fact (in the browser)
+clientside_callback(
+    """
+    function(features, facts) {
+        // Use the first selected value or a default
+        var feature = features && features.length && features[0] !== 'Features' ? features[0] : 'Features';
+        var fact = facts && facts.length && facts[0] !== '' ? facts[0] : '';
+        return fact + ' Sentiment on ' + feature;
+    }
+    """,
     Output('heading', 'children'),
     [Input('feature-dropdown', 'value'),
      Input('fact-dropdown', 'value')]
 )
-def update_heading(selected_features, selected_facts):
-    # Extract the first selected value if it's a list or use a default value
-    feature = selected_features[0] if selected_features and selected_features[0] != 'Features' else 'Features'
-    fact = selected_facts[0] if selected_facts and selected_facts[0] != '' else ''
 
-    return f"{fact} Sentiment on {feature}"
+# Update table with random models and features. Set RANDOM_MODELS_SEED to show the same sample on
+# every redraw; RANDOM_MODELS_ROWS caps how many critical rows are listed per model
+RANDOM_MODELS_COUNT = 5
+RANDOM_MODELS_ROWS = int(os.environ.get('RANDOM_MODELS_ROWS', 5))
+RANDOM_MODELS_SEED = os.environ.get('RANDOM_MODELS_SEED')
+
 
-# Update table with random models and features
-@app.callback(
+def sample_critical_rows(ds, rng, models=RANDOM_MODELS_COUNT, rows_per_model=RANDOM_MODELS_ROWS):
+    # Row positions of up to rows_per_model critical rows for each of `models` random models, drawn
+    # from the precomputed index so the cost does not depend on the dataset size
+    candidates = list(ds.critical_rows)
+    positions = []
+    for model in rng.sample(candidates, min(models, len(candidates))):
+        rows = ds.critical_rows[model]
+        if len(rows) > rows_per_model:
+            rows = rows[sorted(rng.sample(range(len(rows)), rows_per_model))]
+        positions.append(rows)
+    return np.concatenate(positions) if positions else np.empty(0, dtype=np.int32)
+
+
+@callback(
     Output('random-models-table', 'children'),
     [Input('stacked-bar-chart', 'figure')]
 )
 def update_random_models_table(_):
-    # Filter only rows with CriticalRanking 1 or 5
-    filtered_df = df[df['CriticalRanking'].isin([1, 5])]
-
-    # Randomly select 5 models
-    random_models = filtered_df['model'].unique()
-    if len(random_models) > 5:
-        random_models = random.sample(list(random_models), 5)
-    else:
-        random_models = list(random_models)
-
-    # Create a filtered dataframe for these models
-    random_df = filtered_df[filtered_df['model'].isin(random_models)]
+    ds = current_dataset()
+    if ds.frame is None:
+        # The critical rows are indexed over the in-memory rows
+        return None
+    rng = random.Random(RANDOM_MODELS_SEED) if RANDOM_MODELS_SEED is not None else random
+    positions = sample_critical_rows(ds, rng)
+    count_rows(len(positions), len(positions))
+    rows = ds.frame.take(positions)
 
     # Create table rows
     table_rows = []
-    for _, row in random_df.iterrows():
-        critical_ranking = "Positive" if row['CriticalRanking'] == 5 else "Negative"
-        feature_link = html.A(row['Feature'], href=f"/feedback/{row['model']}/{row['Feature']}/{critical_ranking}")
+    for model, feature, ranking in zip(rows['model'], rows['Feature'], rows['CriticalRanking']):
+        critical_ranking = CRITICAL_RANKINGS[int(ranking)]
+        feature_link = html.A(feature, href=f"/feedback/{model}/{feature}/{critical_ranking}")
         table_rows.append(html.Tr([
-            html.Td(row['model']),
+            html.Td(model),
             html.Td(feature_link),
             html.Td(critical_ranking)
         ]))
@@ -584,7 +3363,7 @@ def update_random_models_table(_):
     ])
 
 # Handle bar chart click event
-@app.callback(
+@callback(
     Output('url', 'pathname'),
     [Input('stacked-bar-chart', 'clickData')],
     [State('feature-dropdown', 'value'), State('fact-dropdown', 'value')]
@@ -595,10 +3374,11 @@ def redirect_on_click(clickData, selected_features, selected_facts):
         feature = selected_features[0] if selected_features else 'None'
         fact = selected_facts[0] if selected_facts else 'None'
         return f'/feedback/{model}/{feature}/{fact}'
-    return '/'
+    # Leave the URL alone so rendering the chart does not re-run display_page
+    return dash.no_update
 
 # Define layout for feedback page
-@app.callback(
+@callback(
     Output('page-content', 'children'),
     [Input('url', 'pathname')]
 )
@@ -607,26 +3387,20 @@ def display_page(pathname):
         parts = pathname.split('/')
         if len(parts) >= 5:  # Check if we have enough parts in the path
             model = parts[3]
-            index_str = parts[4]
-            date_str = parts[5]  # Capture the date from the URL
+            row_id_str = parts[4]  # Stable row id; the trailing date segment is informational
 
-            # Convert the index to an integer
+            # Convert the row id to an integer
             try:
-                index = int(index_str)
-                formatted_date = pd.to_datetime(date_str).strftime('%Y-%m-%d')
-
+                row_id = int(row_id_str)
             except ValueError:
                 return html.Div(["Invalid feedback index"])
 
-            # Filter the DataFrame for the given model
-            feedback_details = df[df['model'] == model]
+            # Look the row up directly by its id
+            feedback_row = current_backend().row(row_id)
 
-            if not feedback_details.empty and index < len(feedback_details):
-                feedback_row = feedback_details.iloc[index]
+            if feedback_row is not None and feedback_row['model'] == model:
                 feedback_text = feedback_row['feedback']
-                
-                # Format the date string to match the format used in the DataFrame
-                formatted_date = pd.to_datetime(date_str).strftime('%Y-%m-%d')  
+                formatted_date = feedback_row['date'].strftime('%Y-%m-%d') if pd.notna(feedback_row['date']) else ''
                 
                 return html.Div([
                     html.H3(f"Feedback for Model: {model}", style={'fontSize': '28px'}),
@@ -649,6 +3423,129 @@ def display_page(pathname):
     return get_main_layout()
 
 
+CALLBACKS_REGISTERED = time.perf_counter()
+
+
+DEFAULT_CONFIG = {
+    'csv_path': csv_path,
+    'snapshot_path': snapshot_path,
+    # Set to share one memory-mapped copy of the dataset between all worker processes
+    'shared_dataset_path': os.environ.get('SHARED_DATASET_PATH') or None,
+    'reload_interval': DATASET_RELOAD_INTERVAL,
+    'query_backend': QUERY_BACKEND,
+    'sqlite_path': sqlite_path,
+    # Load the dataset on a background thread so create_app() returns at once; callbacks that need
+    # the data wait for it
+    'background_load': os.environ.get('DATASET_BACKGROUND_LOAD', '0') == '1',
+}
+
+
+def load_live_dataset(config):
+    # Load (or attach to) the first dataset version and prepare the query backend
+    global shared_dataset_path, query_backend
+    started = time.perf_counter()
+    timings = {}
+    backend = make_query_backend(config['query_backend'], sqlite_path)
+    if not backend.in_memory:
+        # Every process queries the same database file, so there is nothing to share or load
+        shared_dataset_path = None
+        backend.refresh(csv_path)
+        timings['query_backend'] = time.perf_counter() - started
+        loaded = time.perf_counter()
+        ds = backend.read_dataset(csv_path)
+        timings['data_load'] = time.perf_counter() - loaded
+    elif shared_dataset_path and pa is not None:
+        ds = open_shared_dataset(csv_path, shared_dataset_path)
+        timings['data_load'] = time.perf_counter() - started
+    else:
+        shared_dataset_path = None
+        ds = load_dataset(csv_path, snapshot_path, timings)
+
+    # Callbacks reach the backend through current_backend(), which waits for the dataset
+    query_backend = backend
+    swap_dataset(ds)
+    metrics.observe('feedback_dataset_load_seconds', time.perf_counter() - started, kind='startup')
+    for phase, seconds in timings.items():
+        record_startup(phase, seconds)
+    if config['reload_interval'] > 0:
+        watch_dataset(config['reload_interval'])
+
+
+def background_load(config):
+    global dataset_load_error
+    try:
+        load_live_dataset(config)
+    except Exception as exc:
+        # Callbacks now fail with this as the cause and /healthz reports it
+        dataset_load_error = exc
+        logger.exception('Loading the dataset failed')
+
+
+def start_dataset_loader(config):
+    global dataset_loader, dataset_loader_pid, loader_config, dataset_load_error
+    dataset_load_error = None
+    loader_config = config
+    dataset_loader = threading.Thread(target=background_load, args=(config,), name='dataset-loader', daemon=True)
+    dataset_loader_pid = os.getpid()
+    dataset_loader.start()
+
+
+def ensure_dataset_loader():
+    # A worker forked while the master was still loading inherits a loader thread that never runs
+    # (joining it returns at once and `dataset` stays None), so it loads the dataset itself
+    if dataset is None and dataset_load_error is None and dataset_loader_pid not in (None, os.getpid()):
+        with worker_threads_lock:
+            if dataset is None and dataset_loader_pid != os.getpid():
+                start_dataset_loader(loader_config)
+
+
+def create_app(config=None):
+    # Load the dataset (now, or in the background) and build the Dash app; callbacks are registered
+    # globally at import
+    global csv_path, snapshot_path, shared_dataset_path, sqlite_path
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    csv_path = config['csv_path']
+    snapshot_path = config['snapshot_path']
+    shared_dataset_path = config['shared_dataset_path']
+    sqlite_path = config['sqlite_path']
+
+    if config['background_load']:
+        start_dataset_loader(config)
+    else:
+        load_live_dataset(config)
+
+    # Initialize the Dash app
+    started = time.perf_counter()
+    app = Dash(__name__, suppress_callback_exceptions=True)
+
+    # Configure CORS
+    CORS(app.server, resources={
+        r"/": {"origins": ""},
+        rf"{API_PREFIX}/*": {"origins": os.environ.get('API_CORS_ORIGINS', '*')},
+    })
+    app.server.register_blueprint(admin)
+    app.server.register_blueprint(instrumentation)
+    app.server.register_blueprint(api, url_prefix=API_PREFIX)
+
+    app.layout = get_app_layout()
+    record_startup('app_setup', time.perf_counter() - started)
+    logger.info('Startup timings (s): %s', ', '.join(f'{phase}={seconds}' for phase, seconds in startup_timings.items()))
+    return app
+
+
+def create_server(config=None):
+    # WSGI entry point, e.g. gunicorn --preload -w 4 'dash_app:create_server()'. With --preload the
+    # master loads the dataset once; with SHARED_DATASET_PATH set every worker maps the same file.
+    # Each worker starts its own dataset watcher on its first request, since threads do not survive fork;
+    # with DATASET_BACKGROUND_LOAD=1 a worker forked before the master finished loading loads its own copy
+    return create_app(config).server
+
+
+record_startup('import', LIBRARIES_IMPORTED - IMPORT_STARTED)
+record_startup('callback_registration', CALLBACKS_REGISTERED - CALLBACKS_STARTED)
+record_startup('module_setup', time.perf_counter() - LIBRARIES_IMPORTED - (CALLBACKS_REGISTERED - CALLBACKS_STARTED))
+
+
 # Run the app
 if __name__ == '__main__':
-    app.run_server(port=8057, debug=False, dev_tools_ui=False, dev_tools_props_check=False)
+    create_app().run(port=8057, debug=False, dev_tools_ui=False, dev_tools_props_check=False)
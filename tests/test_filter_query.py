@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+import dash_app
+
+
+@pytest.mark.parametrize('filter_part, expected', [
+    ('{Summary} contains "engine noise"', ('Summary', 'contains', 'engine noise')),
+    ('{Summary} contains "large boot"', ('Summary', 'contains', 'large boot')),
+    ('{feedback} scontains "not equal to price"', ('feedback', 'contains', 'not equal to price')),
+    ('{segment} = "lt ge ne"', ('segment', 'eq', 'lt ge ne')),
+    ('{brand} ne Nissan', ('brand', 'ne', 'Nissan')),
+    ('{date} >= 2023-05-01', ('date', 'ge', '2023-05-01')),
+    ('{date} datestartswith "2023"', ('date', 'datestartswith', '2023')),
+    ('{Summary} contains "say \\"hi\\""', ('Summary', 'contains', 'say "hi"')),
+    ('{Summary} is blank', (None, None, None)),
+])
+def test_split_filter_part(filter_part, expected):
+    assert dash_app.split_filter_part(filter_part) == expected
+
+
+def test_operator_words_in_values_filter_rows():
+    rows = pd.DataFrame({
+        'Summary': ['engine noise at idle', 'large boot', 'quiet cabin'],
+        'date': pd.to_datetime(['2023-01-01', '2023-02-01', '2023-03-01']),
+    })
+    clauses = dash_app.parse_filter_query('{Summary} contains "engine noise" && {date} < 2023-02-15')
+    assert clauses == [('Summary', 'contains', 'engine noise'), ('date', 'lt', '2023-02-15')]
+    assert list(dash_app.filter_feedback_rows(rows, clauses)['Summary']) == ['engine noise at idle']
+    clauses = dash_app.parse_filter_query('{Summary} contains "large boot"')
+    assert list(dash_app.filter_feedback_rows(rows, clauses)['Summary']) == ['large boot']
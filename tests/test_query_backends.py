@@ -0,0 +1,143 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dash_app
+
+BRANDS = ['Nissan', 'Tata', 'Kia']
+MODELS = {'Nissan': ['Magnite', 'Micra'], 'Tata': ['Nexon', 'Punch'], 'Kia': ['Sonet']}
+FEATURES = ['Price', 'Service', 'Mileage', 'Comfort']
+FACTS = {'Very Positive': 5, 'Positive': 4, 'Neutral': 3, 'Negative': 2, 'Very Negative': 1}
+SOURCES = ['Team-BHP', 'YouTube']
+SEGMENTS = ['Hatchback', 'SUV']
+WORDS = ['smooth', 'mileage', 'price', 'service', 'poor', 'noisy', 'good', 'engine']
+FROM_DATE, TO_DATE = pd.Timestamp('2023-03-01'), pd.Timestamp('2023-09-30')
+
+
+def write_feedback_csv(path, rows=600, seed=0):
+    # Random feedback with missing values in every column the backends treat specially
+    rng = np.random.default_rng(seed)
+    brands = rng.choice(BRANDS, size=rows)
+    facts = rng.choice(list(FACTS), size=rows)
+    frame = pd.DataFrame({
+        'brand': brands,
+        'model': [rng.choice(MODELS[brand]) for brand in brands],
+        'Feature': rng.choice(FEATURES, size=rows),
+        'fact': facts,
+        'source': rng.choice(SOURCES, size=rows),
+        'segment': rng.choice(SEGMENTS, size=rows),
+        'date': (pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, size=rows), unit='D')).strftime('%Y-%m-%d'),
+        'CriticalRanking': [FACTS[fact] for fact in facts],
+        'feedback': [' '.join(rng.choice(WORDS, size=rng.integers(1, 12))) for _ in range(rows)],
+        'Summary': [' '.join(rng.choice(WORDS[:3], size=2)) for _ in range(rows)],
+    }).astype(object)
+    for column, share in [('date', 0.05), ('CriticalRanking', 0.05), ('Feature', 0.03), ('fact', 0.03), ('model', 0.02)]:
+        frame.loc[rng.random(rows) < share, column] = None
+    frame.to_csv(path, index=False)
+
+
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('backends')
+    path = str(directory / 'feedback.csv')
+    write_feedback_csv(path)
+    ds = dash_app.load_dataset(path, str(directory / 'feedback.snapshot.parquet'))
+    sqlite = dash_app.SQLiteBackend(str(directory / 'feedback.sqlite'))
+    sqlite.refresh(path)
+    return ds, dash_app.PandasBackend(), sqlite, path
+
+
+@pytest.fixture
+def pandas_backend(backends, monkeypatch):
+    ds, backend, _, _ = backends
+    monkeypatch.setattr(dash_app, 'dataset', ds)
+    return backend
+
+
+@pytest.fixture
+def sqlite_backend(backends):
+    return backends[2]
+
+
+def as_counts(series):
+    return {key: int(count) for key, count in series.items() if count}
+
+
+@pytest.mark.parametrize('columns, filters, dates', list(itertools.product(
+    [['model'], ['brand'], ['Feature'], ['model', 'fact']],
+    [{}, {'brand': ['Tata']}, {'model': ['Magnite', 'Sonet']}, {'fact': ['Positive', 'Negative'], 'source': ['YouTube']}],
+    [(None, None), (FROM_DATE, TO_DATE), (FROM_DATE, None)],
+)))
+def test_count_by(pandas_backend, sqlite_backend, columns, filters, dates):
+    expected = pandas_backend.count_by(columns, filters, *dates)
+    assert as_counts(sqlite_backend.count_by(columns, filters, *dates)) == as_counts(expected)
+
+
+@pytest.mark.parametrize('ranking, descending, sort_column, clauses', list(itertools.product(
+    ['words', 'newest', 'critical'],
+    [True, False],
+    [None, 'Summary', 'segment', 'brand'],
+    [(), (('Summary', 'contains', 'price'),), (('date', 'ge', '2023-06-01'), ('feedback', 'contains', 'good'))],
+)))
+def test_feedback_page(pandas_backend, sqlite_backend, ranking, descending, sort_column, clauses):
+    for model, offset in [('Magnite', 0), ('Nexon', 10), ('Sonet', 40)]:
+        expected, expected_total = pandas_backend.feedback_page(model, ranking, descending, sort_column, clauses,
+                                                                offset=offset, limit=10)
+        page, total = sqlite_backend.feedback_page(model, ranking, descending, sort_column, clauses,
+                                                   offset=offset, limit=10)
+        assert total == expected_total
+        assert list(page['row_id']) == list(expected['row_id'])
+
+
+def test_row(pandas_backend, sqlite_backend, backends):
+    ds = backends[0]
+    for row_id in [0, 1, 17, 599]:
+        expected, row = pandas_backend.row(row_id), sqlite_backend.row(row_id)
+        for column in ['brand', 'model', 'Feature', 'feedback', 'Summary']:
+            assert (row[column] if pd.notna(row[column]) else None) == (expected[column] if pd.notna(expected[column]) else None)
+        assert (pd.isna(row['date']) and pd.isna(expected['date'])) or row['date'] == expected['date']
+    assert pandas_backend.row(len(ds.frame)) is None
+    assert sqlite_backend.row(len(ds.frame)) is None
+
+
+@pytest.mark.parametrize('granularity, filters', list(itertools.product(
+    ['day', 'week', 'month'], [{}, {'brand': ['Kia']}, {'fact': ['Neutral'], 'model': ['Micra', 'Punch']}],
+)))
+def test_trend_counts(pandas_backend, sqlite_backend, granularity, filters):
+    expected = pandas_backend.trend_counts(granularity, filters, FROM_DATE, TO_DATE)
+    assert as_counts(sqlite_backend.trend_counts(granularity, filters, FROM_DATE, TO_DATE)) == as_counts(expected)
+
+
+@pytest.mark.parametrize('group, filters, dates', list(itertools.product(
+    [None, 'brand', 'model'], [{}, {'source': ['Team-BHP']}, {'model': ['Nowhere']}], [(None, None), (FROM_DATE, TO_DATE)],
+)))
+def test_sentiment_crosstab(pandas_backend, sqlite_backend, group, filters, dates):
+    expected_counts, expected_net = pandas_backend.sentiment_crosstab(group, filters, *dates)
+    counts, net = sqlite_backend.sentiment_crosstab(group, filters, *dates)
+    pd.testing.assert_frame_equal(counts, expected_counts, check_index_type=False, check_column_type=False)
+    pd.testing.assert_frame_equal(net, expected_net, check_index_type=False, check_column_type=False)
+
+
+def test_read_dataset(backends, sqlite_backend):
+    ds, _, _, path = backends
+    summary = sqlite_backend.read_dataset(path)
+    assert summary.frame is None
+    assert summary.row_count == len(ds.frame)
+    assert summary.catalog == ds.catalog
+    assert summary.top_features == ds.top_features
+
+
+def test_sentiment_crosstab_without_facts(tmp_path, monkeypatch):
+    path = str(tmp_path / 'feedback.csv')
+    write_feedback_csv(path, rows=50)
+    pd.read_csv(path).assign(fact=None).to_csv(path, index=False)
+    monkeypatch.setattr(dash_app, 'dataset', dash_app.load_dataset(path, str(tmp_path / 'feedback.snapshot.parquet')))
+    sqlite = dash_app.SQLiteBackend(str(tmp_path / 'feedback.sqlite'))
+    sqlite.refresh(path)
+    for backend in [dash_app.PandasBackend(), sqlite]:
+        for group in [None, 'brand']:
+            counts, net = backend.sentiment_crosstab(group)
+            assert counts.empty and net.empty
+            assert list(counts.columns) == list(net.columns) == []